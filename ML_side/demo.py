@@ -3,12 +3,12 @@ AI-Assisted Navigation Device - Live Demo
 Demonstrates the complete navigation system with real YOLO model
 """
 
+import os
 import cv2
 import time
-from src.llm_integration.navigation_pipeline import BasicNavigationPipeline
-from src.semantic_mapping.library_map_builder import LibraryMapBuilder
-from src.semantic_mapping.scene_memory import SceneMemorySystem
-from src.pathfinding.navigation_planner import NavigationPlanner, NavigationRequest, PathfindingAlgorithm
+
+# Must be set before Ultralytics is first imported
+os.environ.setdefault("YOLO_VERBOSE", "False")
 
 def run_demo():
     """Run live demo of navigation system"""
@@ -19,9 +19,15 @@ def run_demo():
     print(" Initializing navigation system...")
     
     try:
+        # Heavy imports (torch, ultralytics) are deferred until the banner is shown
+        from src.llm_integration.navigation_pipeline import BasicNavigationPipeline
+        from src.semantic_mapping.library_map_builder import LibraryMapBuilder
+        from src.semantic_mapping.scene_memory import SceneMemorySystem
+        from src.pathfinding.navigation_planner import NavigationPlanner, NavigationRequest, PathfindingAlgorithm
+        
         # Core navigation pipeline
         model_path = "models/object_detection/best.pt"
-        nav_pipeline = BasicNavigationPipeline(model_path, use_llm=True)
+        nav_pipeline = BasicNavigationPipeline(model_path, use_llm=True, export=True)
         
         # Semantic understanding
         map_builder = LibraryMapBuilder()
@@ -58,7 +64,12 @@ def run_demo():
     # Try webcam first, fallback to test images
     cap = cv2.VideoCapture(0)
     using_camera = cap.isOpened()
-    
+
+    if using_camera:
+        # Keep only the newest frame so each scenario sees the live scene
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+
     if not using_camera:
         print(" Camera not available, using test images...")
         # Get test images
@@ -22,6 +22,7 @@ def main():
         "openai",          # For OpenAI API (optional)
         "python-dotenv",   # For environment variables
         "tiktoken",        # For token counting (OpenAI)
+        "orjson",          # Fast JSON for LLM request/response payloads
     ]
     
     for package in packages:
@@ -3,6 +3,11 @@ Main Test Runner for AI-Assisted Navigation Device
 Runs comprehensive tests for all system components
 """
 
+import os
+
+# Must be set before Ultralytics is first imported by the test modules
+os.environ.setdefault("YOLO_VERBOSE", "False")
+
 def main():
     """Run all system tests"""
     print("🧪 AI-ASSISTED NAVIGATION DEVICE - TEST SUITE")
@@ -34,6 +39,35 @@ def main():
         integration_result = test_integrated_navigation_planner()
         test_results.append(("Navigation Integration", integration_result))
         
+        # Test LLM integration
+        print("\n🧠 TESTING LLM INTEGRATION")
+        print("-" * 40)
+        
+        from test_llm_integration import (test_bottom_center_obstacle, test_scene_signature, test_result_timestamp,
+                                          test_openai_without_key_stays_offline, test_llm_response_parsing,
+                                          test_scene_cache, test_ollama_stream_early_stop)
+        
+        obstacle_result = test_bottom_center_obstacle()
+        test_results.append(("Bottom-Centre Obstacle", obstacle_result))
+        
+        signature_result = test_scene_signature()
+        test_results.append(("Scene Signature", signature_result))
+        
+        timestamp_result = test_result_timestamp()
+        test_results.append(("Result Timestamp", timestamp_result))
+        
+        offline_result = test_openai_without_key_stays_offline()
+        test_results.append(("Keyless OpenAI Offline", offline_result))
+        
+        parsing_result = test_llm_response_parsing()
+        test_results.append(("LLM Response Parsing", parsing_result))
+        
+        cache_result = test_scene_cache()
+        test_results.append(("Scene Cache", cache_result))
+        
+        stream_result = test_ollama_stream_early_stop()
+        test_results.append(("Ollama Early Stop", stream_result))
+    
     except Exception as e:
         print(f"\n❌ Test suite failed with error: {e}")
         return False
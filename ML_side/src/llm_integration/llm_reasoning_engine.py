@@ -3,14 +3,121 @@ Advanced LLM Integration for Navigation Reasoning
 Supports OpenAI API, local models, and fallback reasoning
 """
 
+import heapq
 import json
 import os
+import re
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from collections import Counter, OrderedDict, deque
+from itertools import islice
 import requests
+from requests.adapters import HTTPAdapter
+import threading
 import time
 
+# orjson is optional; it serialises the prompt payloads several times faster
+try:
+    import orjson
+    _json_dumps, _json_loads = orjson.dumps, orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
+# One "KEY: value" line of the structured response; tolerates markdown bullets/bold
+_FIELD_RE = re.compile(
+    r'^[\s*#-]*(DIRECTION|REASONING|OBSTACLES?|LANDMARKS?|SAFETY[_ ]LEVEL|NEXT[_ ]ACTION|ENVIRONMENT[_ ]TYPE)[\s*]*:[ \t*]*(.*?)\s*$',
+    re.M | re.I
+)
+# Blank line ending the KEY: value block
+_BLOCK_END_RE = re.compile(r'\n[ \t]*\r?\n')
+_FIELD_KEYS = {
+    'DIRECTION': 'direction',
+    'REASONING': 'reasoning',
+    'OBSTACLE': 'obstacles',
+    'OBSTACLES': 'obstacles',
+    'LANDMARK': 'landmarks',
+    'LANDMARKS': 'landmarks',
+    'SAFETY_LEVEL': 'safety_level',
+    'NEXT_ACTION': 'next_action',
+    'ENVIRONMENT_TYPE': 'environment_type'
+}
+
+def _drain_stream(response, stream):
+    """Read a streamed response to the end, then release its connection to the pool"""
+    try:
+        for _ in stream:
+            pass
+    except requests.RequestException:
+        pass  # Connection broke; close() below discards it
+    finally:
+        response.close()
+
+def _drain_in_background(response, stream):
+    """Finish an abandoned stream off the caller's thread (closing it unread would drop the connection)"""
+    threading.Thread(target=_drain_stream, args=(response, stream), daemon=True).start()
+
 class LLMNavigationReasoner:
+    # Invariant instructions, sent as the system prompt so the backend can
+    # reuse the KV cache for this prefix and only prefill the scene-specific part
+    _TASK_BLOCK = """You are an advanced AI navigation assistant helping a visually impaired person navigate through a university library. You provide safe, clear, and helpful navigation guidance in the exact format requested.
+
+TASK: Provide intelligent navigation guidance considering:
+
+1. SAFETY: Highest priority - avoid collisions and hazards
+2. EFFICIENCY: Suggest optimal paths to destination
+3. CLARITY: Use simple, directional language with landmarks
+4. ACCESSIBILITY: Account for visual impairment needs
+5. CONTEXT: Consider the library environment and user intent
+
+"""
+    
+    SYSTEM_PROMPT = _TASK_BLOCK + """RESPOND in this EXACT format:
+DIRECTION: [One clear directional instruction in simple language]
+REASONING: [Brief explanation of why this direction is recommended]
+OBSTACLES: [Comma-separated list of objects to avoid]
+LANDMARKS: [Comma-separated list of reference objects for orientation]
+SAFETY_LEVEL: [Low/Medium/High - current risk assessment]
+NEXT_ACTION: [What the user should do after following this direction]
+ENVIRONMENT_TYPE: [Description of current area - e.g., "reading area", "computer lab", "corridor"]
+
+Example response:
+DIRECTION: Move slightly to your left to avoid the office chair, then continue forward
+REASONING: Chair is blocking direct path but left side appears clear
+OBSTACLES: office-chair
+LANDMARKS: table on your right, monitor ahead
+SAFETY_LEVEL: Medium
+NEXT_ACTION: After passing chair, continue straight toward the reading area
+ENVIRONMENT_TYPE: study area with furniture"""
+    
+    # Same instructions for backends with a JSON output mode (OpenAI)
+    JSON_SYSTEM_PROMPT = _TASK_BLOCK + """RESPOND with a single JSON object with exactly these string keys:
+"direction": One clear directional instruction in simple language
+"reasoning": Brief explanation of why this direction is recommended
+"obstacles": Comma-separated list of objects to avoid
+"landmarks": Comma-separated list of reference objects for orientation
+"safety_level": "Low", "Medium" or "High" - current risk assessment
+"next_action": What the user should do after following this direction
+"environment_type": Description of current area - e.g. "reading area", "computer lab", "corridor"
+
+Example response:
+{"direction": "Move slightly to your left to avoid the office chair, then continue forward", "reasoning": "Chair is blocking direct path but left side appears clear", "obstacles": "office-chair", "landmarks": "table on your right, monitor ahead", "safety_level": "Medium", "next_action": "After passing chair, continue straight toward the reading area", "environment_type": "study area with furniture"}"""
+    
+    # Stop before the model repeats the example. A blank line is not a server-side stop:
+    # the model may open with one (or a preamble) before the first field. The end of the
+    # block (first blank line after a field) is found client-side instead
+    STOP_SEQUENCES = ["Example response:"]
+    
+    # Fixed tail of the NAVIGATION CONTEXT section
+    _CONTEXT_FOOTER = ("Environment: University library with study areas, computer labs, and reading spaces\n"
+                       "User Needs: Clear audio guidance, obstacle avoidance, landmark-based directions")
+    
+    # Recent LLM decisions keyed by scene signature (static scenes skip the LLM)
+    SCENE_CACHE_SIZE = 64
+    
+    # Servers drop idle keep-alive connections after roughly this long
+    IDLE_REWARM_SEC = 70.0
+    
     def __init__(self, model_type: str = "openai", api_key: str = None, model_name: str = "gpt-3.5-turbo"):
         """
         Initialize LLM reasoning engine
@@ -27,22 +134,106 @@ class LLMNavigationReasoner:
         # Set up API endpoints
         if model_type == "openai":
             self.api_url = "https://api.openai.com/v1/chat/completions"
-            self.headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+            self.warmup_url = "https://api.openai.com/v1/models"
+            self._build_payload, self._read_response = self._openai_payload, self._read_openai
+            self.request_timeout = 30
+            self.headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                self.headers["Authorization"] = f"Bearer {self.api_key}"
         elif model_type == "ollama":
             self.api_url = "http://localhost:11434/api/generate"
+            self.warmup_url = "http://localhost:11434/"
+            self._build_payload, self._read_response = self._ollama_payload, self._read_ollama_stream
+            self.request_timeout = 60
             self.headers = {"Content-Type": "application/json"}
+            
+            # Optional quantisation tag, e.g. LLM_QUANT=q4_0 with model_name="llama3.2:1b-instruct"
+            quant = os.getenv('LLM_QUANT')
+            if quant:
+                self.model_name = f"{model_name}-{quant.lower()}"
+            
+            # llama.cpp runtime options forwarded to Ollama
+            # num_batch covers the whole navigation prompt in one prefill pass;
+            # scratch memory grows linearly with num_batch, so never exceed num_ctx
+            num_ctx = int(os.getenv('LLM_NUM_CTX', 2048))
+            self.ollama_options = {
+                "num_ctx": num_ctx,
+                "num_batch": min(int(os.getenv('LLM_NUM_BATCH', 2048)), num_ctx),
+                "use_mmap": True,
+                "use_mlock": False,
+                # Greedy decoding: top_k=1 short-circuits the sampler to argmax, and the
+                # neutral top_p/repeat_penalty skip their vocab-wide passes. Output is
+                # deterministic for a given prompt.
+                "temperature": 0.0,
+                "top_k": 1,
+                "top_p": 1.0,
+                "repeat_penalty": 1.0,
+                "stop": self.STOP_SEQUENCES,
+                "num_predict": 300  # Bounds the tail drained after the block is complete
+            }
+            # GPU offload is left to the Ollama server's own VRAM estimate unless overridden;
+            # the server may sit on another host or GPU than this process
+            gpu_layers = os.getenv('LLM_GPU_LAYERS')
+            if gpu_layers is not None:
+                self.ollama_options["num_gpu"] = int(gpu_layers)
+            
+            # Match physical cores; hyperthreads contend for the same SIMD units
+            threads = os.getenv('LLM_THREADS')
+            self.ollama_options["num_thread"] = int(threads) if threads else self._physical_cores()
         elif model_type == "local":
             # For local models (you'd implement this based on your setup)
             self.api_url = "http://localhost:8000/generate"
+            self.warmup_url = "http://localhost:8000/"
+            self._build_payload, self._read_response = self._local_payload, self._read_local
+            self.request_timeout = 60
             self.headers = {"Content-Type": "application/json"}
         
+        # Pooled keep-alive session so each query skips the TCP/TLS handshake
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update(getattr(self, 'headers', {}))
+        
+        # Open the pooled connection in the background so the first query is hot
+        self._last_call_at = time.monotonic()
+        self._start_warmup()
+        
         # Conversation history for context
-        self.conversation_history = []
+        self.conversation_history = deque(maxlen=10)  # Sliding window of recent decisions
+        self._recent_context_cache = None  # Rendered history, reset when history changes
+        self._scene_cache = OrderedDict()
         
-        print(f"LLM Navigation Reasoner initialized: {model_type} - {model_name}")
+        print(f"LLM Navigation Reasoner initialized: {model_type} - {self.model_name}")
+    
+    @staticmethod
+    def _physical_cores(cap: int = 16) -> int:
+        """Physical core count (psutil if available, else half the logical count)"""
+        try:
+            import psutil
+            cores = psutil.cpu_count(logical=False)
+        except ImportError:
+            cores = None
+        if not cores:
+            cores = max(1, (os.cpu_count() or 8) // 2)
+        return min(cores, cap)
+    
+    def _has_backend(self) -> bool:
+        """True if a query can actually be sent (OpenAI also needs an API key)"""
+        return hasattr(self, '_build_payload') and (self.model_type != "openai" or bool(self.api_key))
+    
+    def _start_warmup(self):
+        """Fire a best-effort request on a daemon thread to open the connection"""
+        # Nothing to warm when every query will take the rule-based fallback
+        if getattr(self, 'warmup_url', None) and self._has_backend():
+            threading.Thread(target=self._warmup, daemon=True).start()
+    
+    def _warmup(self):
+        """Touch the backend so the TCP/TLS connection is pooled and ready"""
+        try:
+            self._session.get(self.warmup_url, timeout=5).close()
+        except requests.RequestException:
+            pass  # Backend not up yet; the first real query will connect
         
     def reason_about_navigation(self, detections: List[Dict], spatial_context: Dict, 
                                user_intent: str = "Navigate safely through the library",
@@ -53,23 +244,34 @@ class LLMNavigationReasoner:
         Returns structured navigation guidance
         """
         
+        # Consecutive frames of a static scene reuse the last LLM decision
+        scene_key = self._scene_key(detections, spatial_context, user_intent, current_location)
+        cached = self._scene_cache.get(scene_key)
+        if cached is not None:
+            self._scene_cache.move_to_end(scene_key)
+            return dict(cached)
+        
+        # Re-open the connection while the prompt is built if it has gone idle
+        now = time.monotonic()
+        if now - self._last_call_at > self.IDLE_REWARM_SEC:
+            self._start_warmup()
+        self._last_call_at = now
+        
         # Build comprehensive reasoning prompt
         prompt = self._build_navigation_prompt(detections, spatial_context, user_intent, current_location)
         
         # Try LLM reasoning first
         try:
-            if self.model_type == "openai" and self.api_key:
-                response = self._query_openai(prompt)
-            elif self.model_type == "ollama":
-                response = self._query_ollama(prompt)
-            elif self.model_type == "local":
-                response = self._query_local_model(prompt)
+            if self._has_backend():
+                response = self._query(prompt)
             else:
                 print("No valid LLM configuration, using fallback reasoning")
                 response = None
                 
             if response:
-                return self._parse_llm_response(response)
+                result = self._parse_llm_response(response)
+                self._cache_scene_result(scene_key, result)
+                return result
                 
         except Exception as e:
             print(f"LLM reasoning failed: {e}")
@@ -78,6 +280,28 @@ class LLMNavigationReasoner:
         # Fallback to advanced rule-based reasoning
         return self._advanced_fallback_reasoning(detections, spatial_context, user_intent)
     
+    @staticmethod
+    def _scene_key(detections: List[Dict], spatial_context: Dict,
+                   user_intent: str, current_location: str) -> tuple:
+        """Structural scene signature, coarse enough to match consecutive frames"""
+        objects = tuple(sorted(
+            (d['class_name'], d.get('frame_position', ''), round(d['confidence'], 1))
+            for d in detections
+        ))
+        return (objects, spatial_context.get('scene_density'), user_intent, current_location)
+    
+    def _cache_scene_result(self, scene_key: tuple, result: Dict[str, str]):
+        """Store an LLM decision in the LRU scene cache"""
+        # Never replay a high-risk assessment; re-query while the hazard persists
+        if result['safety_level'].strip().lower().startswith('high'):
+            self._scene_cache.pop(scene_key, None)
+            return
+        
+        self._scene_cache[scene_key] = dict(result)
+        self._scene_cache.move_to_end(scene_key)
+        if len(self._scene_cache) > self.SCENE_CACHE_SIZE:
+            self._scene_cache.popitem(last=False)
+    
     def _build_navigation_prompt(self, detections: List[Dict], spatial_context: Dict, 
                                 user_intent: str, current_location: str) -> str:
         """Build comprehensive navigation reasoning prompt"""
@@ -91,10 +315,8 @@ class LLMNavigationReasoner:
         # Context and history
         context_desc = self._describe_context(user_intent, current_location)
         
-        # Navigation prompt
-        prompt = f"""You are an advanced AI navigation assistant helping a visually impaired person navigate through a university library. You provide safe, clear, and helpful navigation guidance.
-
-CURRENT SCENE ANALYSIS:
+        # Navigation prompt (static instructions live in SYSTEM_PROMPT)
+        prompt = f"""CURRENT SCENE ANALYSIS:
 {scene_desc}
 
 SPATIAL RELATIONSHIPS:
@@ -104,33 +326,7 @@ NAVIGATION CONTEXT:
 {context_desc}
 
 PREVIOUS CONTEXT:
-{self._get_recent_context()}
-
-TASK: Provide intelligent navigation guidance considering:
-
-1. SAFETY: Highest priority - avoid collisions and hazards
-2. EFFICIENCY: Suggest optimal paths to destination
-3. CLARITY: Use simple, directional language with landmarks
-4. ACCESSIBILITY: Account for visual impairment needs
-5. CONTEXT: Consider the library environment and user intent
-
-RESPOND in this EXACT format:
-DIRECTION: [One clear directional instruction in simple language]
-REASONING: [Brief explanation of why this direction is recommended]
-OBSTACLES: [Comma-separated list of objects to avoid]
-LANDMARKS: [Comma-separated list of reference objects for orientation]
-SAFETY_LEVEL: [Low/Medium/High - current risk assessment]
-NEXT_ACTION: [What the user should do after following this direction]
-ENVIRONMENT_TYPE: [Description of current area - e.g., "reading area", "computer lab", "corridor"]
-
-Example response:
-DIRECTION: Move slightly to your left to avoid the office chair, then continue forward
-REASONING: Chair is blocking direct path but left side appears clear
-OBSTACLES: office-chair
-LANDMARKS: table on your right, monitor ahead
-SAFETY_LEVEL: Medium
-NEXT_ACTION: After passing chair, continue straight toward the reading area
-ENVIRONMENT_TYPE: study area with furniture"""
+{self._get_recent_context()}"""
 
         return prompt
     
@@ -139,18 +335,19 @@ ENVIRONMENT_TYPE: study area with furniture"""
         if not detections:
             return "Empty scene with no objects currently detected."
         
-        desc = f"Scene contains {len(detections)} objects in a {spatial_context['scene_density']} environment:\n"
+        parts = [f"Scene contains {len(detections)} objects in a {spatial_context['scene_density']} environment:"]
         
-        # Sort by confidence for better description
-        sorted_detections = sorted(detections, key=lambda x: x['confidence'], reverse=True)
+        # List the most confident objects first (top 10 keeps the prompt bounded)
+        sorted_detections = heapq.nlargest(10, detections, key=lambda x: x['confidence'])
         
         for i, det in enumerate(sorted_detections):
-            desc += f"{i+1}. {det['class_name'].upper()} - "
-            desc += f"Confidence: {det['confidence']:.2f}, "
-            desc += f"Size: {det['relative_size']}, "
-            desc += f"Position: {det['frame_position']}\n"
+            parts.append(f"{i+1}. {det['class_name'].upper()} - "
+                         f"Confidence: {det['confidence']:.2f}, "
+                         f"Size: {det['relative_size']}, "
+                         f"Position: {det['frame_position']}")
         
-        return desc
+        parts.append("")  # Keep the trailing newline
+        return "\n".join(parts)
     
     def _describe_spatial_relationships(self, spatial_context: Dict) -> str:
         """Describe spatial relationships between objects"""
@@ -159,91 +356,147 @@ ENVIRONMENT_TYPE: study area with furniture"""
         if not relationships:
             return "No clear spatial relationships detected between objects."
         
-        desc = f"Found {len(relationships)} spatial relationships:\n"
+        parts = [f"Found {len(relationships)} spatial relationships:"]
         
         # Show most important relationships
         for i, rel in enumerate(relationships[:5]):  # Top 5 relationships
-            desc += f"{i+1}. {rel['object1']} is {rel['relationship']} {rel['object2']}"
+            line = f"{i+1}. {rel['object1']} is {rel['relationship']} {rel['object2']}"
             if 'distance' in rel:
-                desc += f" (distance: {rel['distance']:.0f})"
-            desc += "\n"
+                line = f"{line} (distance: {rel['distance']:.0f})"
+            parts.append(line)
         
-        return desc
+        parts.append("")
+        return "\n".join(parts)
     
     def _describe_context(self, user_intent: str, current_location: str) -> str:
         """Describe navigation context and user intent"""
-        context = f"User Intent: {user_intent}\n"
-        context += f"Current Location: {current_location}\n"
-        context += f"Environment: University library with study areas, computer labs, and reading spaces\n"
-        context += f"User Needs: Clear audio guidance, obstacle avoidance, landmark-based directions"
-        
-        return context
+        return f"User Intent: {user_intent}\nCurrent Location: {current_location}\n{self._CONTEXT_FOOTER}"
     
     def _get_recent_context(self) -> str:
         """Get recent conversation context"""
+        if self._recent_context_cache is not None:
+            return self._recent_context_cache
+        
         if not self.conversation_history:
             return "No previous navigation history"
         
-        recent = self.conversation_history[-3:]  # Last 3 interactions
-        context = "Recent navigation decisions:\n"
+        start = max(0, len(self.conversation_history) - 3)
+        recent = islice(self.conversation_history, start, None)  # Last 3 interactions
+        parts = ["Recent navigation decisions:"]
         
         for i, hist in enumerate(recent):
-            context += f"{i+1}. {hist.get('direction', 'Unknown direction')}\n"
+            parts.append(f"{i+1}. {hist.get('direction', 'Unknown direction')}")
         
+        parts.append("")
+        context = "\n".join(parts)
+        self._recent_context_cache = context
         return context
     
-    def _query_openai(self, prompt: str) -> str:
-        """Query OpenAI API"""
+    def _query(self, prompt: str) -> str:
+        """POST the prompt to the configured backend and return the raw reply text"""
+        payload = self._build_payload(prompt)
+        stream = payload.get('stream', False)
+        
+        response = self._session.post(self.api_url, data=_json_dumps(payload),
+                                      timeout=self.request_timeout, stream=stream)
+        try:
+            response.raise_for_status()
+            return self._read_response(response)
+        except Exception:
+            response.close()
+            raise
+        finally:
+            # Streamed responses are released by the reader, possibly after a background drain
+            if not stream:
+                response.close()
+    
+    def _openai_payload(self, prompt: str) -> Dict[str, Any]:
+        """OpenAI chat completion request (JSON mode)"""
         if not self.api_key:
             raise ValueError("OpenAI API key not provided")
         
-        payload = {
+        return {
             "model": self.model_name,
             "messages": [
-                {
-                    "role": "system", 
-                    "content": "You are an expert navigation assistant for visually impaired users. Provide clear, safe, and helpful navigation guidance in the exact format requested."
-                },
+                {"role": "system", "content": self.JSON_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
+            "response_format": {"type": "json_object"},
             "max_tokens": 300,
             "temperature": 0.3
         }
-        
-        response = requests.post(self.api_url, headers=self.headers, json=payload, timeout=30)
-        response.raise_for_status()
-        
-        result = response.json()
-        return result['choices'][0]['message']['content']
     
-    def _query_ollama(self, prompt: str) -> str:
-        """Query local Ollama model"""
-        payload = {
+    def _ollama_payload(self, prompt: str) -> Dict[str, Any]:
+        """Streaming Ollama generate request"""
+        return {
             "model": self.model_name,
+            "system": self.SYSTEM_PROMPT,
             "prompt": prompt,
-            "stream": False
+            "stream": True,
+            "options": self.ollama_options,
+            "keep_alive": "30m"  # Keep weights resident between queries
         }
-        
-        response = requests.post(self.api_url, headers=self.headers, json=payload, timeout=60)
-        response.raise_for_status()
-        
-        result = response.json()
-        return result['response']
     
-    def _query_local_model(self, prompt: str) -> str:
-        """Query local model API"""
-        payload = {
-            "prompt": prompt,
+    def _local_payload(self, prompt: str) -> Dict[str, Any]:
+        """Generic local completion request"""
+        return {
+            "prompt": f"{self.SYSTEM_PROMPT}\n\n{prompt}",
             "max_tokens": 300,
+            "stop": self.STOP_SEQUENCES,
             "temperature": 0.3
         }
-        
-        response = requests.post(self.api_url, headers=self.headers, json=payload, timeout=60)
-        response.raise_for_status()
-        
-        result = response.json()
+    
+    @staticmethod
+    def _read_openai(response) -> str:
+        result = _json_loads(response.content)
+        return result['choices'][0]['message']['content']
+    
+    @staticmethod
+    def _read_local(response) -> str:
+        result = _json_loads(response.content)
         return result.get('response', result.get('text', ''))
     
+    @staticmethod
+    def _read_ollama_stream(response) -> str:
+        """
+        Collect streamed Ollama tokens, returning as soon as the KEY: value block
+        is complete: the ENVIRONMENT_TYPE line (the last field of the format) or
+        the first blank line after a field
+        
+        The rest of the stream is drained on a daemon thread rather than dropped,
+        so the keep-alive connection goes back to the session pool
+        """
+        lines = []
+        line = []
+        in_block = False
+        stream = response.iter_lines()
+        
+        for raw in stream:
+            if not raw:
+                continue
+            chunk = _json_loads(raw)
+            pieces = chunk.get('response', '').split('\n')
+            line.append(pieces[0])
+            for piece in pieces[1:]:
+                text = ''.join(line)
+                line = [piece]
+                field = _FIELD_RE.match(text)
+                if field:
+                    in_block = True
+                elif in_block and not text.strip():
+                    _drain_in_background(response, stream)
+                    return '\n'.join(lines)
+                lines.append(text)
+                if field and field.group(1).upper().replace(' ', '_') == 'ENVIRONMENT_TYPE':
+                    _drain_in_background(response, stream)
+                    return '\n'.join(lines)
+            if chunk.get('done'):
+                break
+        
+        response.close()
+        lines.append(''.join(line))
+        return '\n'.join(lines)
+    
     def _parse_llm_response(self, response_text: str) -> Dict[str, str]:
         """Parse structured LLM response"""
         result = {
@@ -256,42 +509,37 @@ ENVIRONMENT_TYPE: study area with furniture"""
             'environment_type': 'General area'
         }
         
-        # Parse the structured response
-        lines = response_text.strip().split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip().lower()
-                value = value.strip()
-                
-                if 'direction' in key:
-                    result['direction'] = value
-                elif 'reasoning' in key:
-                    result['reasoning'] = value
-                elif 'obstacle' in key:
-                    result['obstacles'] = value
-                elif 'landmark' in key:
-                    result['landmarks'] = value
-                elif 'safety' in key:
-                    result['safety_level'] = value
-                elif 'next' in key or 'action' in key:
-                    result['next_action'] = value
-                elif 'environment' in key or 'type' in key:
-                    result['environment_type'] = value
+        # JSON-mode replies (OpenAI) go straight through json.loads;
+        # KEY: value text from the other backends is parsed in one regex scan
+        text = response_text.lstrip()
+        if text.startswith('{'):
+            try:
+                fields = _json_loads(text)
+            except ValueError:
+                fields = {}
+            for key in result:
+                value = fields.get(key)
+                if isinstance(value, list):
+                    result[key] = ', '.join(map(str, value))
+                elif value is not None:
+                    result[key] = str(value)
+        else:
+            # Only the block from the first field to the next blank line; leading
+            # blank lines or a preamble don't end the reply early
+            first = _FIELD_RE.search(response_text)
+            block = _BLOCK_END_RE.split(response_text[first.start(1):], 1)[0] if first else ''
+            for key, value in _FIELD_RE.findall(block):
+                result[_FIELD_KEYS[key.upper().replace(' ', '_')]] = value
         
         # Store in conversation history
         self.conversation_history.append({
-            'timestamp': datetime.now(),
+            'timestamp': time.monotonic(),
             'direction': result['direction'],
             'reasoning': result['reasoning'],
             'safety_level': result['safety_level']
         })
         
-        # Keep only recent history
-        if len(self.conversation_history) > 10:
-            self.conversation_history = self.conversation_history[-10:]
+        self._recent_context_cache = None
         
         return result
     
@@ -309,17 +557,30 @@ ENVIRONMENT_TYPE: study area with furniture"""
                 'environment_type': 'Open area'
             }
         
-        # Analyze object positions and risks
-        center_objects = [d for d in detections if 'center' in d.get('frame_position', '')]
-        left_objects = [d for d in detections if 'left' in d.get('frame_position', '')]
-        right_objects = [d for d in detections if 'right' in d.get('frame_position', '')]
+        # Analyze object positions, landmarks and object types in a single pass
+        center_objects = []
+        left_count = right_count = 0
+        high_conf_objects = []
+        counts = Counter()
+        
+        for d in detections:
+            position = d.get('frame_position', '')
+            if 'center' in position:
+                center_objects.append(d)
+            if 'left' in position:
+                left_count += 1
+            if 'right' in position:
+                right_count += 1
+            if d['confidence'] > 0.7 and len(high_conf_objects) < 3:
+                high_conf_objects.append(d['class_name'])
+            counts[d['class_name']] += 1
         
         # Determine navigation strategy
         if center_objects:
             primary_obstacle = max(center_objects, key=lambda x: x['confidence'])
             
             # Choose best avoidance direction
-            if len(left_objects) < len(right_objects):
+            if left_count < right_count:
                 direction = f"Move to your left to avoid the {primary_obstacle['class_name']}, then continue forward"
                 next_action = "After moving left, proceed straight"
             else:
@@ -336,22 +597,20 @@ ENVIRONMENT_TYPE: study area with furniture"""
             next_action = "Continue straight and monitor for new obstacles"
         
         # Identify landmarks
-        high_conf_objects = [d['class_name'] for d in detections if d['confidence'] > 0.7]
-        landmarks = ', '.join(high_conf_objects[:3]) if high_conf_objects else 'None'
+        landmarks = ', '.join(high_conf_objects) if high_conf_objects else 'None'
         
         # Identify obstacles to avoid
         obstacles = [d['class_name'] for d in center_objects]
         obstacles_str = ', '.join(obstacles) if obstacles else 'None in direct path'
         
         # Determine environment type
-        object_types = [d['class_name'] for d in detections]
-        if 'monitor' in object_types and len([o for o in object_types if o == 'monitor']) >= 2:
+        if counts['monitor'] >= 2:
             env_type = 'Computer lab'
-        elif 'books' in object_types or 'book' in object_types:
+        elif counts['books'] or counts['book']:
             env_type = 'Reading area'
-        elif 'table' in object_types and 'office-chair' in object_types:
+        elif counts['table'] and counts['office-chair']:
             env_type = 'Study area'
-        elif 'whiteboard' in object_types:
+        elif counts['whiteboard']:
             env_type = 'Presentation area'
         else:
             env_type = 'General library area'
@@ -9,12 +9,112 @@ from ultralytics import YOLO
 from datetime import datetime
 import json
 import os
+import queue
+import threading
+import time
+from enum import IntEnum
 from .llm_reasoning_engine import LLMNavigationReasoner
 
+# Frame position names indexed [vertical][horizontal] (0 = top/left, 2 = bottom/right)
+_POSITION_TABLE = (
+    ("top-left", "top", "top-right"),
+    ("left", "center", "right"),
+    ("bottom-left", "bottom", "bottom-right")
+)
+
+class Pos(IntEnum):
+    """Frame position ids (3 * vertical bin + horizontal bin), same layout as _POSITION_TABLE"""
+    TOP_LEFT = 0
+    TOP_CENTER = 1
+    TOP_RIGHT = 2
+    LEFT = 3
+    CENTER = 4
+    RIGHT = 5
+    BOTTOM_LEFT = 6
+    BOTTOM_CENTER = 7
+    BOTTOM_RIGHT = 8
+
+# Positions treated as being in the walking path
+_PATH_POSITIONS = np.array([Pos.CENTER, Pos.BOTTOM_CENTER])
+
+# Packed detection code: Pos id in the low 4 bits, class id above it
+_POS_MASK = 0xF
+_CLS_SHIFT = 4
+
+# Relative size labels by np.digitize bin of area / image area
+_SIZE_BINS = np.array([0.05, 0.2])
+_SIZE_LABELS = ("small", "medium", "large")
+
+# Position bins for centre / frame size; 0.33 and 0.67 themselves fall in the centre bin
+_POS_BINS = np.array([0.33, np.nextafter(0.67, 1.0)])
+
+# Position name -> Pos id, for detections that arrive without arrays
+_POSITION_IDS = {name: v * 3 + h for v, row in enumerate(_POSITION_TABLE) for h, name in enumerate(row)}
+
+# Spatial relationship names by code
+_RELATIONS = ("left of", "right of", "above", "below", "near")
+
+def _cuda_available():
+    """Check for a CUDA device (torch ships with ultralytics, but keep the check defensive)"""
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+# Largest batch the exported models must accept (for offline process_frames callers)
+EXPORT_BATCH = 4
+
+def _export_model(model_path, imgsz):
+    """
+    Export .pt weights once (TensorRT FP16 on CUDA, ONNX for onnxruntime on CPU) and return
+    the path to load; exported files sit next to the weights and are reused on later starts
+    """
+    if not str(model_path).endswith('.pt'):
+        return model_path
+    
+    cuda = _cuda_available()
+    exported = os.path.splitext(model_path)[0] + ('.engine' if cuda else '.onnx')
+    if os.path.exists(exported):
+        return exported
+    
+    try:
+        if cuda:
+            YOLO(model_path).export(format='engine', half=True, imgsz=imgsz, workspace=4,
+                                    dynamic=True, batch=EXPORT_BATCH)
+        else:
+            YOLO(model_path).export(format='onnx', imgsz=imgsz, dynamic=True)
+        print(f"✅ Exported YOLO model to {exported}")
+        return exported
+    except Exception as e:
+        print(f"⚠️ YOLO export failed, using PyTorch weights: {e}")
+        return model_path
+
 class BasicNavigationPipeline:
-    def __init__(self, model_path, use_llm=True, llm_model_type="openai"):
-        """Initialize with your trained YOLO model and LLM reasoner"""
-        self.yolo_model = YOLO(model_path)
+    def __init__(self, model_path, use_llm=True, llm_model_type="openai", max_staleness_s=5.0, imgsz=640,
+                 export=False):
+        """
+        Initialize with your trained YOLO model and LLM reasoner
+        
+        Args:
+            max_staleness_s: Longest time an LLM decision is reused while the scene signature is unchanged
+            imgsz: Fixed inference size passed to every predict call
+            export: Run inference on a TensorRT/ONNX export of .pt weights; the first use runs the
+                export (can take minutes) and writes the file next to the weights
+        """
+        if export:
+            model_path = _export_model(model_path, imgsz)
+        self.yolo_model = YOLO(model_path, task='detect')
+        
+        # Fixed predict arguments: pinned imgsz, FP16 on the first GPU when CUDA is present
+        self._predict_kwargs = dict(imgsz=imgsz, conf=0.5, verbose=False)
+        if _cuda_available():
+            self._predict_kwargs.update(half=True, device=0)
+        
+        # Fuse conv+bn once up front, then warm up so the first real frame doesn't pay for setup
+        if str(model_path).endswith('.pt'):
+            self.yolo_model.fuse()
+        self.yolo_model.predict(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), **self._predict_kwargs)
         self.class_names = {
             1: "books", 2: "monitor", 3: "office-chair", 
             4: "whiteboard", 5: "table", 6: "tv"
@@ -28,140 +128,226 @@ class BasicNavigationPipeline:
         else:
             self.llm_reasoner = None
             print("ℹ️ Using rule-based reasoning only")
+        
+        # Scene-signature gate in front of the LLM
+        self.max_staleness_s = max_staleness_s
+        self._last_sig = None
+        self._last_decision = None
+        self._last_decision_at = 0.0
     
     def process_frame(self, image, user_intent="Navigate safely", current_location="Library"):
         """Process single frame and return enhanced detections"""
         # Run YOLO detection
-        results = self.yolo_model.predict(image, conf=0.5, verbose=False)
+        results = self.yolo_model.predict(image, **self._predict_kwargs)
         
-        # Convert to our enhanced format
-        detections = self._convert_detections(results[0], image.shape)
+        return self._analyze_result(results[0], image.shape, user_intent, current_location)
+    
+    def process_frames(self, images, user_intent="Navigate safely", current_location="Library"):
+        """
+        Process a batch of frames with a single YOLO call
+        
+        Args:
+            images: List of BGR frames (Ultralytics batches a list in one forward pass)
+            
+        Returns:
+            List of per-frame results, same format as process_frame
+        """
+        if not images:
+            return []
+        
+        results = self.yolo_model.predict(list(images), **self._predict_kwargs)
+        
+        return [
+            self._analyze_result(result, image.shape, user_intent, current_location)
+            for result, image in zip(results, images)
+        ]
+    
+    def _analyze_result(self, yolo_result, image_shape, user_intent, current_location):
+        """Turn one YOLO result into detections, spatial context and a navigation decision"""
+        # Convert to our enhanced format (arrays for vectorised consumers, dicts for the rest)
+        arrays = self._extract_arrays(yolo_result, image_shape)
+        detections = self._detections_from_arrays(arrays)
         
         # Basic spatial analysis
-        spatial_context = self._analyze_spatial_relationships(detections)
+        spatial_context = self._analyze_spatial_relationships(detections, arrays['centers'])
         
-        # Advanced navigation reasoning with LLM
+        # Advanced navigation reasoning with LLM, skipped while the scene is unchanged
         if self.use_llm and self.llm_reasoner:
-            navigation_decision = self.llm_reasoner.reason_about_navigation(
-                detections, spatial_context, user_intent, current_location
-            )
+            sig = self._scene_signature(arrays, spatial_context, user_intent, current_location)
+            now = time.monotonic()
+            if sig == self._last_sig and now - self._last_decision_at < self.max_staleness_s:
+                navigation_decision = dict(self._last_decision)
+            else:
+                navigation_decision = self.llm_reasoner.reason_about_navigation(
+                    detections, spatial_context, user_intent, current_location
+                )
+                self._last_sig = sig
+                self._last_decision = dict(navigation_decision)
+                self._last_decision_at = now
         else:
-            navigation_decision = self._basic_navigation_reasoning(detections, spatial_context)
+            navigation_decision = self._basic_navigation_reasoning(detections, spatial_context, arrays)
         
+        timestamp_ns = time.monotonic_ns()
         return {
             'detections': detections,
+            'arrays': arrays,
             'spatial_context': spatial_context,
             'navigation_decision': navigation_decision,
-            'timestamp': datetime.now()
+            'timestamp_ns': timestamp_ns
         }
     
+    @staticmethod
+    def result_datetime(result):
+        """Wall-clock datetime for a process_frame result (converted only when needed, e.g. for serialization)"""
+        # Offset taken now rather than at import, so clock adjustments since then are honoured
+        wall_offset_ns = time.time_ns() - time.monotonic_ns()
+        return datetime.fromtimestamp((result['timestamp_ns'] + wall_offset_ns) / 1e9)
+    
+    def _scene_signature(self, arrays, spatial_context, user_intent="Navigate safely", current_location="Library"):
+        """Hashable summary of a scene: (class id, center on a 20 px grid) per object, density and request"""
+        cells = (arrays['centers'] // 20).astype(int).tolist()
+        return (
+            tuple(sorted((c, cx, cy) for c, (cx, cy) in zip(arrays['cls'].tolist(), cells))),
+            spatial_context['scene_density'],
+            user_intent,
+            current_location
+        )
+    
     def _convert_detections(self, yolo_result, image_shape):
         """Convert YOLO results to enhanced format"""
-        detections = []
-        
-        if yolo_result.boxes is None:
-            return detections
+        return self._detections_from_arrays(self._extract_arrays(yolo_result, image_shape))
+    
+    def _extract_arrays(self, yolo_result, image_shape):
+        """
+        Extract detections as structure-of-arrays
         
+        Returns:
+            Dict of per-detection arrays: xyxy (N,4), xyxy_i (N,4) int32 pixel boxes for drawing,
+            centers (N,2), sizes (N,2), areas, conf, cls, relative_size,
+            pos_idx (N,2) as (h, v) position bins and codes (int32, Pos id | class id << 4)
+        """
         boxes = yolo_result.boxes
+        if boxes is None or len(boxes) == 0:
+            return {
+                'xyxy': np.empty((0, 4), dtype=np.float32),
+                'xyxy_i': np.empty((0, 4), dtype=np.int32),
+                'centers': np.empty((0, 2), dtype=np.float32),
+                'sizes': np.empty((0, 2), dtype=np.float32),
+                'areas': np.empty(0, dtype=np.float32),
+                'conf': np.empty(0, dtype=np.float32),
+                'cls': np.empty(0, dtype=np.int32),
+                'relative_size': np.empty(0, dtype='<U6'),
+                'pos_idx': np.empty((0, 2), dtype=np.intp),
+                'codes': np.empty(0, dtype=np.int32)
+            }
+        
         height, width = image_shape[:2]
         
-        for i in range(len(boxes)):
-            # Extract YOLO data
-            xyxy = boxes.xyxy[i].cpu().numpy()
-            conf = float(boxes.conf[i].cpu().numpy())
-            cls = int(boxes.cls[i].cpu().numpy())
-            
-            # Calculate enhanced properties
-            x1, y1, x2, y2 = xyxy
-            center_x = (x1 + x2) / 2
-            center_y = (y1 + y2) / 2
-            box_width = x2 - x1
-            box_height = y2 - y1
-            area = box_width * box_height
-            
-            detection = {
+        # Extract YOLO data with one device->host transfer per field
+        xyxy = boxes.xyxy.cpu().numpy()
+        confs = boxes.conf.cpu().numpy()
+        clss = boxes.cls.cpu().numpy().astype(np.int32)
+        
+        # Calculate enhanced properties for all boxes at once
+        centers = (xyxy[:, :2] + xyxy[:, 2:]) * 0.5
+        sizes = xyxy[:, 2:] - xyxy[:, :2]
+        areas = sizes[:, 0] * sizes[:, 1]
+        
+        ratios = areas / float(width * height)
+        relative_sizes = np.asarray(_SIZE_LABELS)[np.digitize(ratios, _SIZE_BINS)]
+        
+        # 0 = left/top, 1 = center, 2 = right/bottom
+        pos_ratios = centers / np.array([width, height], dtype=np.float64)
+        pos_idx = np.digitize(pos_ratios, _POS_BINS)
+        
+        return {
+            'xyxy': xyxy,
+            'xyxy_i': xyxy.astype(np.int32),
+            'centers': centers,
+            'sizes': sizes,
+            'areas': areas,
+            'conf': confs,
+            'cls': clss,
+            'relative_size': relative_sizes,
+            'pos_idx': pos_idx,
+            'codes': ((pos_idx[:, 1] * 3 + pos_idx[:, 0]) | (clss.astype(np.intp) << _CLS_SHIFT)).astype(np.int32)
+        }
+    
+    def _detections_from_arrays(self, arrays):
+        """Build the per-detection dicts consumed by the reasoning/mapping modules"""
+        detections = []
+        
+        # Resolve each distinct class id to its name once
+        cls_list = arrays['cls'].tolist()
+        names = {cls: self.class_names.get(cls, f"unknown_{cls}") for cls in set(cls_list)}
+        
+        # Only the per-detection dict assembly stays in Python
+        for (x1, y1, x2, y2), (cx, cy), (bw, bh), area, conf, cls, rel_size, (h, v) in zip(
+                arrays['xyxy'].tolist(), arrays['centers'].tolist(), arrays['sizes'].tolist(),
+                arrays['areas'].tolist(), arrays['conf'].tolist(), cls_list,
+                arrays['relative_size'].tolist(), arrays['pos_idx'].tolist()):
+            detections.append({
                 'class_id': cls,
-                'class_name': self.class_names.get(cls, f"unknown_{cls}"),
+                'class_name': names[cls],
                 'confidence': conf,
                 'bbox': {
-                    'x1': float(x1), 'y1': float(y1), 'x2': float(x2), 'y2': float(y2),
-                    'center_x': float(center_x), 'center_y': float(center_y),
-                    'width': float(box_width), 'height': float(box_height)
+                    'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
+                    'center_x': cx, 'center_y': cy,
+                    'width': bw, 'height': bh
                 },
-                'area': float(area),
-                'relative_size': self._get_relative_size(area, width * height),
-                'frame_position': self._get_frame_position(center_x, center_y, width, height)
-            }
-            
-            detections.append(detection)
+                'area': area,
+                'relative_size': rel_size,
+                'frame_position': _POSITION_TABLE[v][h]
+            })
         
         return detections
     
     def _get_relative_size(self, area, image_area):
         """Determine relative size category"""
-        ratio = area / image_area
-        if ratio < 0.05:
-            return "small"
-        elif ratio < 0.2:
-            return "medium"
-        else:
-            return "large"
+        return _SIZE_LABELS[np.digitize(area / image_area, _SIZE_BINS)]
     
     def _get_frame_position(self, x, y, width, height):
         """Determine position within frame"""
-        x_ratio = x / width
-        y_ratio = y / height
-        
-        if x_ratio < 0.33:
-            h_pos = "left"
-        elif x_ratio > 0.67:
-            h_pos = "right"
-        else:
-            h_pos = "center"
-        
-        if y_ratio < 0.33:
-            v_pos = "top"
-        elif y_ratio > 0.67:
-            v_pos = "bottom"
-        else:
-            v_pos = "center"
-        
-        if h_pos == "center" and v_pos == "center":
-            return "center"
-        elif h_pos == "center":
-            return v_pos
-        elif v_pos == "center":
-            return h_pos
-        else:
-            return f"{v_pos}-{h_pos}"
+        return _POSITION_TABLE[np.digitize(y / height, _POS_BINS)][np.digitize(x / width, _POS_BINS)]
     
-    def _analyze_spatial_relationships(self, detections):
-        """Basic spatial relationship analysis"""
+    def _analyze_spatial_relationships(self, detections, centers=None):
+        """
+        Basic spatial relationship analysis
+        
+        Args:
+            detections: Detection dicts
+            centers: Optional (N, 2) array of box centers; rebuilt from the dicts if omitted
+        """
         if len(detections) < 2:
             return {'relationships': [], 'scene_density': 'sparse', 'object_count': len(detections)}
         
-        relationships = []
-        for i, det1 in enumerate(detections):
-            for j, det2 in enumerate(detections[i+1:], i+1):
-                # Calculate distance between centers
-                dx = det1['bbox']['center_x'] - det2['bbox']['center_x']
-                dy = det1['bbox']['center_y'] - det2['bbox']['center_y']
-                distance = np.sqrt(dx**2 + dy**2)
-                
-                # Determine relationship
-                if abs(dx) > abs(dy) and abs(dx) > 50:
-                    relation = "left of" if dx > 0 else "right of"
-                elif abs(dy) > abs(dx) and abs(dy) > 50:
-                    relation = "above" if dy > 0 else "below"
-                else:
-                    relation = "near"
-                
-                relationships.append({
-                    'object1': det1['class_name'],
-                    'object2': det2['class_name'],
-                    'relationship': relation,
-                    'distance': float(distance)
-                })
+        # Pairwise center offsets for every detection pair at once
+        if centers is None:
+            centers = np.array([(d['bbox']['center_x'], d['bbox']['center_y']) for d in detections])
+        centers = np.asarray(centers, dtype=np.float64)
+        
+        # Unique pairs (i < j), in the same order as the nested loop; offsets and the
+        # sqrt are only computed for these pairs, not the full N x N matrix
+        iu = np.triu_indices(len(detections), k=1)
+        diff = centers[iu[0]] - centers[iu[1]]
+        dx, dy = diff[:, 0], diff[:, 1]
+        distances = np.sqrt(dx * dx + dy * dy)
+        
+        # Determine relationship codes (indices into _RELATIONS)
+        adx, ady = np.abs(dx), np.abs(dy)
+        codes = np.where((adx > ady) & (adx > 50), np.where(dx > 0, 0, 1),
+                         np.where((ady > adx) & (ady > 50), np.where(dy > 0, 2, 3), 4))
+        
+        names = [d['class_name'] for d in detections]
+        relationships = [
+            {
+                'object1': names[i],
+                'object2': names[j],
+                'relationship': _RELATIONS[code],
+                'distance': distance
+            }
+            for i, j, code, distance in zip(iu[0].tolist(), iu[1].tolist(), codes.tolist(), distances.tolist())
+        ]
         
         scene_density = "sparse" if len(detections) <= 2 else "moderate" if len(detections) <= 5 else "crowded"
         
@@ -171,8 +357,15 @@ class BasicNavigationPipeline:
             'object_count': len(detections)
         }
     
-    def _basic_navigation_reasoning(self, detections, spatial_context):
-        """Basic navigation reasoning (placeholder for LLM)"""
+    def _basic_navigation_reasoning(self, detections, spatial_context, arrays=None):
+        """
+        Basic navigation reasoning (placeholder for LLM)
+        
+        Args:
+            detections: Detection dicts
+            spatial_context: Output of _analyze_spatial_relationships
+            arrays: Optional structure-of-arrays from _extract_arrays; rebuilt from the dicts if omitted
+        """
         if not detections:
             return {
                 'direction': "No objects detected, proceed with caution",
@@ -181,9 +374,17 @@ class BasicNavigationPipeline:
                 'safety_level': "Low"
             }
         
-        # Simple rule-based reasoning
-        obstacles = [det['class_name'] for det in detections if det['frame_position'] in ['center', 'bottom-center']]
-        landmarks = [det['class_name'] for det in detections if det['confidence'] > 0.7]
+        if arrays is None:
+            codes = np.array([_POSITION_IDS[det['frame_position']] | (det['class_id'] << _CLS_SHIFT)
+                              for det in detections], dtype=np.int32)
+            confs = np.array([det['confidence'] for det in detections])
+        else:
+            codes, confs = arrays['codes'], arrays['conf']
+        
+        # Simple rule-based reasoning on packed integer codes; names are only gathered for the output strings
+        in_path = np.isin(codes & _POS_MASK, _PATH_POSITIONS)
+        obstacles = [detections[i]['class_name'] for i in np.flatnonzero(in_path).tolist()]
+        landmarks = [detections[i]['class_name'] for i in np.flatnonzero(confs > 0.7).tolist()]
         
         if obstacles:
             direction = f"Obstacles ahead: {', '.join(obstacles)}. Move around them."
@@ -213,7 +414,7 @@ if __name__ == "__main__":
         print("- experiments/object_detection/yolo_v8s_heavy_aug/weights/best.pt")
         exit(1)
     
-    pipeline = BasicNavigationPipeline(model_path)
+    pipeline = BasicNavigationPipeline(model_path, export=True)
     
     # Test with webcam
     cap = cv2.VideoCapture(0)
@@ -251,15 +452,12 @@ if __name__ == "__main__":
             
             # Show result
             display_frame = sample_image.copy()
-            for det in result['detections']:
-                bbox = det['bbox']
-                cv2.rectangle(display_frame, 
-                            (int(bbox['x1']), int(bbox['y1'])),
-                            (int(bbox['x2']), int(bbox['y2'])),
-                            (0, 255, 0), 2)
+            boxes = result['arrays']['xyxy_i'].tolist()
+            for (x1, y1, x2, y2), det in zip(boxes, result['detections']):
+                cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
                 cv2.putText(display_frame, 
                           f"{det['class_name']} ({det['confidence']:.2f})",
-                          (int(bbox['x1']), int(bbox['y1']-10)),
+                          (x1, y1 - 10),
                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
             
             cv2.imshow('Navigation Pipeline Test', display_frame)
@@ -272,14 +470,96 @@ if __name__ == "__main__":
     print("Starting navigation pipeline test...")
     print("Press 'q' to quit")
     
+    # Ask the camera for the inference size; frames that still arrive larger are resized
+    INFER_SIZE = (640, 480)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, INFER_SIZE[0])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, INFER_SIZE[1])
+    
+    # YOLO and the LLM each run on their own worker so neither stalls the camera loop;
+    # live frames go to YOLO one at a time, as batching would only delay the newest one
+    frame_queue = queue.Queue(maxsize=2)
+    result_queue = queue.Queue()
+    llm_queue = queue.Queue(maxsize=1)
+    llm_reasoner = pipeline.llm_reasoner if pipeline.use_llm else None
+    pipeline.use_llm = False  # inference worker uses rule-based reasoning; LLM refines it asynchronously
+    last_decision = {'value': None}
+    decision_lock = threading.Lock()
+    last_enqueued = {'sig': None, 'at': 0.0}
+    
+    # Display buffer reused across frames (reallocated only if the frame size changes)
+    display_frame = None
+    
+    def _infer_worker():
+        while True:
+            item = frame_queue.get()
+            if item is None:
+                break
+            frame, small = item
+            result = pipeline.process_frame(small)
+            result_queue.put((frame, result))
+            if llm_reasoner is not None:
+                # Only hand the scene to the LLM if it changed or the last decision is stale
+                sig = pipeline._scene_signature(result['arrays'], result['spatial_context'])
+                now = time.monotonic()
+                if sig == last_enqueued['sig'] and now - last_enqueued['at'] < pipeline.max_staleness_s:
+                    continue
+                try:
+                    llm_queue.put_nowait((result['detections'], result['spatial_context']))
+                    last_enqueued['sig'], last_enqueued['at'] = sig, now
+                except queue.Full:
+                    pass  # LLM still busy with an earlier scene
+    
+    def _llm_worker():
+        while True:
+            item = llm_queue.get()
+            if item is None:
+                break
+            detections, spatial_context = item
+            decision = llm_reasoner.reason_about_navigation(
+                detections, spatial_context, "Navigate safely", "Library"
+            )
+            with decision_lock:
+                last_decision['value'] = decision
+    
+    workers = [threading.Thread(target=_infer_worker, daemon=True)]
+    if llm_reasoner is not None:
+        workers.append(threading.Thread(target=_llm_worker, daemon=True))
+    for worker in workers:
+        worker.start()
+    
     try:
         while True:
             ret, frame = cap.read()
             if not ret:
                 break
             
-            # Process frame
-            result = pipeline.process_frame(frame)
+            # Detector gets the downsampled frame, the display keeps the original
+            if (frame.shape[1], frame.shape[0]) != INFER_SIZE:
+                small = cv2.resize(frame, INFER_SIZE, interpolation=cv2.INTER_LINEAR)
+            else:
+                small = frame
+            try:
+                frame_queue.put_nowait((frame, small))
+            except queue.Full:
+                pass  # drop the frame rather than block on inference
+            
+            # Only the most recent result is drawn
+            latest = None
+            while True:
+                try:
+                    latest = result_queue.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if latest is None:
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                continue
+            
+            frame, result = latest
+            with decision_lock:
+                if last_decision['value'] is not None:
+                    result['navigation_decision'] = last_decision['value']
             
             # Display results
             print(f"\n--- Frame Analysis ---")
@@ -292,16 +572,20 @@ if __name__ == "__main__":
             print(f"Safety: {result['navigation_decision']['safety_level']}")
             
             # Visualize detections
-            display_frame = frame.copy()
-            for det in result['detections']:
-                bbox = det['bbox']
-                cv2.rectangle(display_frame, 
-                            (int(bbox['x1']), int(bbox['y1'])),
-                            (int(bbox['x2']), int(bbox['y2'])),
-                            (0, 255, 0), 2)
+            if display_frame is None or display_frame.shape != frame.shape:
+                display_frame = np.empty_like(frame)
+            np.copyto(display_frame, frame)
+            if (frame.shape[1], frame.shape[0]) == INFER_SIZE:
+                boxes = result['arrays']['xyxy_i'].tolist()
+            else:
+                # Map boxes from inference coordinates back to the display frame
+                scale = np.array([frame.shape[1] / INFER_SIZE[0], frame.shape[0] / INFER_SIZE[1]] * 2)
+                boxes = (result['arrays']['xyxy'] * scale).astype(np.int32).tolist()
+            for (x1, y1, x2, y2), det in zip(boxes, result['detections']):
+                cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
                 cv2.putText(display_frame, 
                           f"{det['class_name']} ({det['confidence']:.2f})",
-                          (int(bbox['x1']), int(bbox['y1']-10)),
+                          (x1, y1 - 10),
                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
             
             cv2.imshow('Navigation Pipeline Test', display_frame)
@@ -312,5 +596,11 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         print("\nShutting down...")
     finally:
+        # Workers are daemons; the sentinels only stop them early if their queues have room
+        for q in (frame_queue, llm_queue):
+            try:
+                q.put_nowait(None)
+            except queue.Full:
+                pass
         cap.release()
         cv2.destroyAllWindows()
\ No newline at end of file
@@ -4,32 +4,151 @@ Optimal pathfinding with heuristic search
 """
 
 import heapq
+import itertools
 import math
 import time
 from typing import List, Tuple, Optional, Dict, Set
-from dataclasses import dataclass, field
 import numpy as np
 
-from .grid_map import LibraryGridMap, CellType
+from .grid_map import LibraryGridMap, CellType, line_clear
 
-@dataclass
-class AStarNode:
-    """Node for A* pathfinding"""
-    x: int
-    y: int
-    g_cost: float = float('inf')  # Cost from start
-    h_cost: float = 0.0           # Heuristic cost to goal
-    f_cost: float = field(init=False)  # Total cost
-    parent: Optional['AStarNode'] = None
+# Numba is optional; without it the pure-Python search below is used
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 8-connected neighbour offsets (same order as LibraryGridMap.get_neighbors)
+_NEIGHBOR_DX = np.array([0, 0, 1, -1, 1, 1, -1, -1], dtype=np.int64)
+_NEIGHBOR_DY = np.array([1, -1, 0, 0, 1, -1, 1, -1], dtype=np.int64)
+
+# Node expansions per compiled call; the timeout is checked between slices
+_EXPANSION_SLICE = 4096
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _heap_push(heap_f, heap_h, heap_i, size, f, h, idx):
+        """Sift a (f, h, idx) entry up a binary min-heap stored in three arrays"""
+        pos = size
+        while pos > 0:
+            up = (pos - 1) >> 1
+            if heap_f[up] < f or (heap_f[up] == f and heap_h[up] <= h):
+                break
+            heap_f[pos] = heap_f[up]
+            heap_h[pos] = heap_h[up]
+            heap_i[pos] = heap_i[up]
+            pos = up
+        heap_f[pos] = f
+        heap_h[pos] = h
+        heap_i[pos] = idx
+        return size + 1
     
-    def __post_init__(self):
-        self.f_cost = self.g_cost + self.h_cost
+    @njit(cache=True)
+    def _heap_pop(heap_f, heap_h, heap_i, size):
+        """Remove the root of the heap; returns (idx, new_size)"""
+        top = heap_i[0]
+        size -= 1
+        f = heap_f[size]
+        h = heap_h[size]
+        idx = heap_i[size]
+        pos = 0
+        while True:
+            child = 2 * pos + 1
+            if child >= size:
+                break
+            right = child + 1
+            if right < size and (heap_f[right] < heap_f[child] or
+                                 (heap_f[right] == heap_f[child] and heap_h[right] < heap_h[child])):
+                child = right
+            if f < heap_f[child] or (f == heap_f[child] and h <= heap_h[child]):
+                break
+            heap_f[pos] = heap_f[child]
+            heap_h[pos] = heap_h[child]
+            heap_i[pos] = heap_i[child]
+            pos = child
+        heap_f[pos] = f
+        heap_h[pos] = h
+        heap_i[pos] = idx
+        return top, size
     
-    def __lt__(self, other):
-        """For priority queue comparison"""
-        if self.f_cost != other.f_cost:
-            return self.f_cost < other.f_cost
-        return self.h_cost < other.h_cost  # Tie-breaker: prefer lower h_cost
+    @njit(cache=True)
+    def _astar_kernel(cost, blocked, g, parent, closed, heap_f, heap_h, heap_i, size,
+                      gx, gy, h_weight, goal_tol, ndx, ndy, nstep, max_steps):
+        """
+        A* over a flat grid with a manual binary heap and lazy deletion, expanding at
+        most max_steps nodes; the search state lives in the caller's arrays so the
+        search resumes where the previous call stopped
+        
+        Returns:
+            (heap_f, heap_h, heap_i, heap size, reached goal index or -1, nodes explored);
+            the heap arrays are reallocated when they run out of room
+        """
+        H, W = cost.shape
+        goal = gy * W + gx
+        explored = 0
+        
+        while size > 0 and explored < max_steps:
+            idx, size = _heap_pop(heap_f, heap_h, heap_i, size)
+            if closed[idx]:
+                continue  # Stale entry superseded by a cheaper push
+            closed[idx] = True
+            explored += 1
+            
+            cx = idx % W
+            cy = idx // W
+            if idx == goal or abs(cx - gx) + abs(cy - gy) <= goal_tol:
+                return heap_f, heap_h, heap_i, size, idx, explored
+            
+            for k in range(8):
+                nx = cx + ndx[k]
+                ny = cy + ndy[k]
+                if nx < 0 or nx >= W or ny < 0 or ny >= H or blocked[ny, nx]:
+                    continue
+                nidx = ny * W + nx
+                if closed[nidx]:
+                    continue
+                
+                tentative = g[idx] + nstep[k] * cost[ny, nx]
+                if tentative < g[nidx]:
+                    g[nidx] = tentative
+                    parent[nidx] = idx
+                    
+                    if size == heap_f.shape[0]:
+                        # Grow the heap arrays (rare; lazy deletion leaves stale entries)
+                        heap_f = np.concatenate((heap_f, np.empty(size)))
+                        heap_h = np.concatenate((heap_h, np.empty(size)))
+                        heap_i = np.concatenate((heap_i, np.empty(size, dtype=np.int64)))
+                    
+                    h = h_weight * math.sqrt(float((nx - gx) ** 2 + (ny - gy) ** 2))
+                    size = _heap_push(heap_f, heap_h, heap_i, size, tentative + h, h, nidx)
+        
+        return heap_f, heap_h, heap_i, size, -1, explored
+    
+    @njit(cache=True)
+    def _smooth_kernel(path_x, path_y, bits, width):
+        """
+        Greedy line-of-sight smoothing over a path
+        
+        Returns:
+            int32 array of the indices of the waypoints to keep
+        """
+        n = path_x.shape[0]
+        keep = np.empty(n, dtype=np.int32)
+        keep[0] = 0
+        count = 1
+        i = 0
+        while i < n - 1:
+            furthest = i + 1
+            for j in range(i + 2, n):
+                if line_clear(bits, width, path_x[i], path_y[i], path_x[j], path_y[j]):
+                    furthest = j
+                else:
+                    break
+            keep[count] = furthest
+            count += 1
+            i = furthest
+        return keep[:count]
 
 class AStarPathfinder:
     def __init__(self, grid_map: LibraryGridMap):
@@ -40,14 +159,26 @@ class AStarPathfinder:
             grid_map: LibraryGridMap instance for navigation
         """
         self.grid_map = grid_map
-        self.heuristic_weight = 1.0  # Weight for heuristic (1.0 = optimal A*)
+        self.heuristic_weight = 1.0  # Weight for heuristic (1.0 = optimal A*, >1.0 = weighted A* via set_heuristic_weight)
+        self.goal_tolerance = 0  # Manhattan distance (cells) at which the goal counts as reached
         self.diagonal_cost = math.sqrt(2)  # Cost for diagonal movement
         
+        # Obstacle mask of the grid map, rebuilt when the map version changes
+        self._blocked = None
+        self._blocked_version = -1
+        
         # Statistics
         self.last_search_stats = {}
         
         print("✅ A* Pathfinder initialized")
     
+    def _get_blocked(self) -> np.ndarray:
+        """Current obstacle mask for the search"""
+        if self._blocked is None or self._blocked_version != self.grid_map.version:
+            self._blocked = self.grid_map.grid == CellType.OBSTACLE.value
+            self._blocked_version = self.grid_map.version
+        return self._blocked
+    
     def find_path(self, start_x: int, start_y: int, goal_x: int, goal_y: int, 
                   timeout: float = 5.0, smooth_path: bool = True) -> Optional[List[Tuple[int, int]]]:
         """
@@ -73,32 +204,44 @@ class AStarPathfinder:
             print(f"❌ Invalid goal position: ({goal_x}, {goal_y})")
             return None
         
+        if NUMBA_AVAILABLE:
+            return self._find_path_compiled(start_x, start_y, goal_x, goal_y, start_time, timeout, smooth_path)
+        
+        # Raw grid snapshot for the Python loop (no per-neighbour method dispatch)
+        cost = np.ascontiguousarray(self.grid_map.cost_grid, dtype=np.float64)
+        blocked = self._get_blocked()
+        width, height = self.grid_map.grid_width, self.grid_map.grid_height
+        weight = self.heuristic_weight
+        goal_tol = self.goal_tolerance
+        neighbor_steps = tuple(zip(_NEIGHBOR_DX.tolist(), _NEIGHBOR_DY.tolist(),
+                                   [1.0] * 4 + [self.diagonal_cost] * 4))
+        
         # Initialize data structures
-        open_set = []  # Priority queue of nodes to explore
+        # Heap of (f_cost, h_cost, counter, x, y) tuples; a node is re-pushed whenever
+        # its g_cost improves and outdated entries are skipped when popped (lazy deletion)
+        open_set = []
         closed_set: Set[Tuple[int, int]] = set()  # Already explored nodes
-        node_map: Dict[Tuple[int, int], AStarNode] = {}  # All created nodes
+        best_g: Dict[Tuple[int, int], float] = {(start_x, start_y): 0.0}
+        parents: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {(start_x, start_y): None}
+        counter = itertools.count()
         
-        # Create start node
-        start_node = AStarNode(
-            x=start_x, 
-            y=start_y, 
-            g_cost=0.0,
-            h_cost=self._calculate_heuristic(start_x, start_y, goal_x, goal_y)
-        )
-        
-        heapq.heappush(open_set, start_node)
-        node_map[(start_x, start_y)] = start_node
+        start_h = self._calculate_heuristic(start_x, start_y, goal_x, goal_y)
+        heapq.heappush(open_set, (start_h, start_h, next(counter), start_x, start_y))
         
         nodes_explored = 0
         
         # Main A* search loop
         while open_set and (time.time() - start_time) < timeout:
-            current_node = heapq.heappop(open_set)
+            _, _, _, current_x, current_y = heapq.heappop(open_set)
+            current_key = (current_x, current_y)
+            if current_key in closed_set:
+                continue  # Stale entry; a cheaper one was already expanded
             nodes_explored += 1
+            current_g = best_g[current_key]
             
-            # Check if we reached the goal
-            if current_node.x == goal_x and current_node.y == goal_y:
-                path = self._reconstruct_path(current_node)
+            # Check if we reached the goal (or are within the goal tolerance)
+            if abs(current_x - goal_x) + abs(current_y - goal_y) <= goal_tol:
+                path = self._reconstruct_path(parents, current_key)
                 
                 # Apply path smoothing if requested
                 if smooth_path:
@@ -108,7 +251,7 @@ class AStarPathfinder:
                 self.last_search_stats = {
                     'nodes_explored': nodes_explored,
                     'path_length': len(path),
-                    'path_cost': current_node.g_cost,
+                    'path_cost': current_g,
                     'search_time': time.time() - start_time,
                     'success': True
                 }
@@ -116,44 +259,29 @@ class AStarPathfinder:
                 return path
             
             # Mark current node as explored
-            closed_set.add((current_node.x, current_node.y))
-            
-            # Explore neighbors
-            neighbors = self.grid_map.get_neighbors(current_node.x, current_node.y, include_diagonal=True)
+            closed_set.add(current_key)
             
-            for neighbor_x, neighbor_y in neighbors:
-                # Skip if already explored
-                if (neighbor_x, neighbor_y) in closed_set:
+            # Explore neighbors (bounds and obstacle check fused into one test)
+            for dx, dy, step in neighbor_steps:
+                neighbor_x, neighbor_y = current_x + dx, current_y + dy
+                if not (0 <= neighbor_x < width and 0 <= neighbor_y < height) or blocked[neighbor_y, neighbor_x]:
                     continue
                 
-                # Calculate movement cost
-                movement_cost = self._calculate_movement_cost(
-                    current_node.x, current_node.y, neighbor_x, neighbor_y
-                )
+                neighbor_key = (neighbor_x, neighbor_y)
                 
-                tentative_g_cost = current_node.g_cost + movement_cost
+                # Skip if already explored
+                if neighbor_key in closed_set:
+                    continue
                 
-                # Get or create neighbor node
-                neighbor_key = (neighbor_x, neighbor_y)
-                if neighbor_key not in node_map:
-                    neighbor_node = AStarNode(
-                        x=neighbor_x,
-                        y=neighbor_y,
-                        h_cost=self._calculate_heuristic(neighbor_x, neighbor_y, goal_x, goal_y)
-                    )
-                    node_map[neighbor_key] = neighbor_node
-                else:
-                    neighbor_node = node_map[neighbor_key]
+                tentative_g_cost = current_g + step * cost[neighbor_y, neighbor_x]
                 
-                # Update node if we found a better path
-                if tentative_g_cost < neighbor_node.g_cost:
-                    neighbor_node.parent = current_node
-                    neighbor_node.g_cost = tentative_g_cost
-                    neighbor_node.f_cost = neighbor_node.g_cost + neighbor_node.h_cost
-                    
-                    # Add to open set if not already there
-                    if neighbor_node not in open_set:
-                        heapq.heappush(open_set, neighbor_node)
+                # Push the neighbour again if we found a better path
+                if tentative_g_cost < best_g.get(neighbor_key, float('inf')):
+                    best_g[neighbor_key] = tentative_g_cost
+                    parents[neighbor_key] = current_key
+                    hx, hy = neighbor_x - goal_x, neighbor_y - goal_y
+                    h_cost = math.sqrt(hx*hx + hy*hy) * weight
+                    heapq.heappush(open_set, (tentative_g_cost + h_cost, h_cost, next(counter), neighbor_x, neighbor_y))
         
         # No path found
         self.last_search_stats = {
@@ -167,6 +295,71 @@ class AStarPathfinder:
         
         return None
     
+    def _find_path_compiled(self, start_x: int, start_y: int, goal_x: int, goal_y: int,
+                            start_time: float, timeout: float, smooth_path: bool) -> Optional[List[Tuple[int, int]]]:
+        """Run the search in the compiled kernel on flat grid arrays"""
+        cost = np.ascontiguousarray(self.grid_map.cost_grid, dtype=np.float64)
+        blocked = self._get_blocked()
+        height, width = cost.shape
+        n = width * height
+        neighbor_step = np.array([1.0] * 4 + [self.diagonal_cost] * 4, dtype=np.float64)
+        
+        # Search state, kept here so the kernel can resume between slices
+        g = np.full(n, np.inf)
+        parent = np.full(n, -1, dtype=np.int64)
+        closed = np.zeros(n, dtype=np.bool_)
+        heap_f = np.empty(4 * n + 1)
+        heap_h = np.empty(4 * n + 1)
+        heap_i = np.empty(4 * n + 1, dtype=np.int64)
+        
+        start = start_y * width + start_x
+        g[start] = 0.0
+        start_h = self._calculate_heuristic(start_x, start_y, goal_x, goal_y)
+        size = _heap_push(heap_f, heap_h, heap_i, 0, start_h, start_h, start)
+        
+        # Expand in slices so the timeout is still honoured
+        goal_idx = -1
+        nodes_explored = 0
+        while size > 0 and goal_idx < 0 and (time.time() - start_time) < timeout:
+            heap_f, heap_h, heap_i, size, goal_idx, explored = _astar_kernel(
+                cost, blocked, g, parent, closed, heap_f, heap_h, heap_i, size,
+                goal_x, goal_y, float(self.heuristic_weight), int(self.goal_tolerance),
+                _NEIGHBOR_DX, _NEIGHBOR_DY, neighbor_step, _EXPANSION_SLICE
+            )
+            nodes_explored += explored
+        
+        if goal_idx < 0:
+            self.last_search_stats = {
+                'nodes_explored': nodes_explored,
+                'path_length': 0,
+                'path_cost': float('inf'),
+                'search_time': time.time() - start_time,
+                'success': False,
+                'timeout': size > 0
+            }
+            return None
+        
+        # Reconstruct path from the parent array
+        path = []
+        idx = int(goal_idx)
+        while idx != -1:
+            path.append((idx % width, idx // width))
+            idx = int(parent[idx])
+        path.reverse()
+        
+        if smooth_path:
+            path = self._smooth_path(path)
+        
+        self.last_search_stats = {
+            'nodes_explored': nodes_explored,
+            'path_length': len(path),
+            'path_cost': float(g[goal_idx]),
+            'search_time': time.time() - start_time,
+            'success': True
+        }
+        
+        return path
+    
     def _calculate_heuristic(self, x1: int, y1: int, x2: int, y2: int) -> float:
         """Calculate heuristic distance between two points"""
         # Use Euclidean distance as heuristic
@@ -195,14 +388,15 @@ class AStarPathfinder:
         
         return base_cost * traversal_cost
     
-    def _reconstruct_path(self, goal_node: AStarNode) -> List[Tuple[int, int]]:
-        """Reconstruct path from goal node back to start"""
+    def _reconstruct_path(self, parents: Dict[Tuple[int, int], Optional[Tuple[int, int]]],
+                          goal: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Reconstruct path from goal back to start through the parent map"""
         path = []
-        current = goal_node
+        current = goal
         
         while current is not None:
-            path.append((current.x, current.y))
-            current = current.parent
+            path.append(current)
+            current = parents[current]
         
         path.reverse()
         return path
@@ -212,6 +406,16 @@ class AStarPathfinder:
         if len(path) < 3:
             return path
         
+        if NUMBA_AVAILABLE:
+            # Whole smoothing pass (including the line-of-sight walks) runs compiled
+            coords = np.array(path, dtype=np.int64)
+            keep = _smooth_kernel(coords[:, 0], coords[:, 1],
+                                  self.grid_map.get_obstacle_bits(), self.grid_map.grid_width)
+            smoothed_path = [path[k] for k in keep.tolist()]
+            if smoothed_path[-1] != path[-1]:
+                smoothed_path.append(path[-1])
+            return smoothed_path
+        
         smoothed_path = [path[0]]  # Always keep start
         
         i = 0
@@ -241,38 +445,8 @@ class AStarPathfinder:
     
     def _is_line_of_sight(self, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
         """Check if there's a clear line of sight between two points"""
-        x0, y0 = start
-        x1, y1 = end
-        
-        # Bresenham's line algorithm
-        dx = abs(x1 - x0)
-        dy = abs(y1 - y0)
-        
-        x, y = x0, y0
-        
-        x_inc = 1 if x1 > x0 else -1
-        y_inc = 1 if y1 > y0 else -1
-        
-        error = dx - dy
-        
-        while True:
-            # Check if current cell is blocked
-            if not self.grid_map.is_valid_position(x, y):
-                return False
-            
-            # Check if we reached the end
-            if x == x1 and y == y1:
-                break
-            
-            # Bresenham step
-            if error > 0:
-                x += x_inc
-                error -= dy
-            else:
-                y += y_inc
-                error += dx
-        
-        return True
+        # 4-connected Bresenham walk over the grid map's packed obstacle bitmap
+        return self.grid_map.is_line_clear(start[0], start[1], end[0], end[1])
     
     def find_path_with_waypoints(self, waypoints: List[Tuple[int, int]], 
                                 timeout_per_segment: float = 5.0) -> Optional[List[Tuple[int, int]]]:
@@ -339,6 +513,16 @@ class AStarPathfinder:
         """
         self.heuristic_weight = max(0.1, weight)
         print(f"✅ Heuristic weight set to {self.heuristic_weight}")
+    
+    def set_goal_tolerance(self, tolerance: int):
+        """
+        Set how close the search must get to the goal before stopping
+        
+        Args:
+            tolerance: Manhattan distance in grid cells (0 = exact goal)
+        """
+        self.goal_tolerance = max(0, int(tolerance))
+        print(f"✅ Goal tolerance set to {self.goal_tolerance}")
 
 
 # Test A* pathfinder
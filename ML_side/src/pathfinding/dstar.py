@@ -1,42 +1,245 @@
 """
-D* (Dynamic A*) Pathfinding Algorithm
+D* Lite Pathfinding Algorithm
 Handles dynamic environments with changing obstacles
 """
 
 import heapq
-import math
+import logging
 import time
 from typing import List, Tuple, Optional, Dict, Set
-from dataclasses import dataclass, field
-from enum import Enum
 import numpy as np
 
 from .grid_map import LibraryGridMap, CellType
 
-class NodeState(Enum):
-    NEW = 0      # Not yet processed
-    OPEN = 1     # In the priority queue
-    CLOSED = 2   # Already processed
+# Planner messages go through logging so replans don't block on console I/O
+logger = logging.getLogger(__name__)
 
-@dataclass
-class DStarNode:
-    """Node for D* pathfinding"""
-    x: int
-    y: int
-    tag: NodeState = NodeState.NEW
-    h: float = 0.0           # Cost-to-goal estimate
-    k: float = 0.0           # Key value for priority
-    parent: Optional['DStarNode'] = None
-    cost: float = float('inf')  # Actual cost from goal
-    
-    def __lt__(self, other):
-        """For priority queue comparison"""
-        return self.k < other.k
+# Node tags as plain ints, so checks are a single compare in Python and compile under Numba
+NEW = 0      # Not yet processed
+OPEN = 1     # In the priority queue
+CLOSED = 2   # Already processed
+
+# Tags are packed four to a byte, two bits per node: node i sits in byte i >> 2 at bit 2 * (i & 3)
+_TAG_MASK = 3
+
+# Cost changes found by _detect_environment_changes, one row per changed cell
+COST_CHANGE_DTYPE = np.dtype([('x', np.int32), ('y', np.int32), ('old', np.float32), ('new', np.float32)])
+
+# Numba is optional; without it the pure-Python search below is used
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 8-connected neighbour offsets (same order as LibraryGridMap.get_neighbors) and step lengths
+_NEIGHBOR_DX = np.array([0, 0, 1, -1, 1, 1, -1, -1], dtype=np.int64)
+_NEIGHBOR_DY = np.array([1, -1, 0, 0, 1, -1, 1, -1], dtype=np.int64)
+# Keys, g/rhs and arc costs are float64
+_INF = np.inf
+_SQRT2 = np.sqrt(2.0)
+_NEIGHBOR_STEP = np.array([1.0, 1.0, 1.0, 1.0] + [_SQRT2] * 4, dtype=np.float64)
+
+# Direction index of the opposite offset, so arc(neighbor -> current) can be looked up
+_REVERSE_DIR = tuple(
+    next(r for r in range(8) if _NEIGHBOR_DX[r] == -_NEIGHBOR_DX[d] and _NEIGHBOR_DY[r] == -_NEIGHBOR_DY[d])
+    for d in range(8)
+)
+_REVERSE_DIR_ARR = np.array(_REVERSE_DIR, dtype=np.int64)
+
+# Above this fraction of changed cells, recomputing every g with whole-array relaxation
+# beats incremental vertex updates
+_FULL_REPLAN_FRACTION = 0.1
+
+# Keys are sums along different paths, so a vertex whose exact key ties the start's can
+# round a few ulps above it; the termination test treats keys this close as equal
+_KEY_TOL = 1e-9
+
+def _key_below(top1, top2, s1, s2):
+    """Whether a queued key (top1, top2) still precedes the start's key (s1, s2), up to _KEY_TOL"""
+    if top1 < s1 - _KEY_TOL:
+        return True
+    return top1 <= s1 + _KEY_TOL and top2 < s2 + _KEY_TOL
+
+if NUMBA_AVAILABLE:
+    _key_below_nb = njit(cache=True)(_key_below)
+    
+    # Open list is a 4-ary min-heap over (k1, k2, idx) in three arrays: the children of i
+    # sit together at 4i+1..4i+4, so the tree is half as deep as a binary heap and each
+    # sift-down compares siblings that share a cache line
+    @njit(cache=True)
+    def _entry_less(a1, a2, ai, b1, b2, bi):
+        """Lexicographic (k1, k2, idx) comparison, the same order heapq uses on tuples"""
+        if a1 != b1:
+            return a1 < b1
+        if a2 != b2:
+            return a2 < b2
+        return ai < bi
+    
+    @njit(cache=True)
+    def _heap_push(heap_k1, heap_k2, heap_idx, size, k1, k2, idx):
+        """Sift a (k1, k2, idx) entry up the 4-ary heap"""
+        pos = size
+        while pos > 0:
+            up = (pos - 1) >> 2
+            if not _entry_less(k1, k2, idx, heap_k1[up], heap_k2[up], heap_idx[up]):
+                break
+            heap_k1[pos] = heap_k1[up]
+            heap_k2[pos] = heap_k2[up]
+            heap_idx[pos] = heap_idx[up]
+            pos = up
+        heap_k1[pos] = k1
+        heap_k2[pos] = k2
+        heap_idx[pos] = idx
+        return size + 1
+    
+    @njit(cache=True)
+    def _heap_pop(heap_k1, heap_k2, heap_idx, size):
+        """Remove the smallest entry from the 4-ary heap; returns the new size"""
+        size -= 1
+        k1 = heap_k1[size]
+        k2 = heap_k2[size]
+        idx = heap_idx[size]
+        pos = 0
+        while True:
+            first = 4 * pos + 1
+            if first >= size:
+                break
+            
+            # Smallest of up to four contiguous children
+            child = first
+            last = min(first + 4, size)
+            for c in range(first + 1, last):
+                if _entry_less(heap_k1[c], heap_k2[c], heap_idx[c], heap_k1[child], heap_k2[child], heap_idx[child]):
+                    child = c
+            
+            if not _entry_less(heap_k1[child], heap_k2[child], heap_idx[child], k1, k2, idx):
+                break
+            heap_k1[pos] = heap_k1[child]
+            heap_k2[pos] = heap_k2[child]
+            heap_idx[pos] = heap_idx[child]
+            pos = child
+        heap_k1[pos] = k1
+        heap_k2[pos] = k2
+        heap_idx[pos] = idx
+        return size
+    
+    @njit(cache=True)
+    def _get_tag_nb(tags, i):
+        """Read the 2-bit tag of node i"""
+        return (tags[i >> 2] >> ((i & 3) << 1)) & _TAG_MASK
+    
+    @njit(cache=True)
+    def _set_tag_nb(tags, i, value):
+        """Write the 2-bit tag of node i"""
+        shift = (i & 3) << 1
+        tags[i >> 2] = (tags[i >> 2] & ~(_TAG_MASK << shift)) | (value << shift)
+    
+    @njit(cache=True)
+    def _update_vertex_nb(u, g, rhs, k1, k2, tag, heap_k1, heap_k2, heap_idx, size,
+                          arc, W, h_base, goal, km, ndx, ndy, nrev):
+        """Compiled counterpart of DStarPathfinder._update_vertex"""
+        if u != goal:
+            # One-step lookahead over the successors
+            best = np.inf
+            for d in range(8):
+                if arc[u, d] == np.inf:
+                    continue
+                s = u + ndy[d] * W + ndx[d]
+                v = arc[s, nrev[d]] + g[s]
+                if v < best:
+                    best = v
+            rhs[u] = best
+        
+        if g[u] != rhs[u]:
+            m = min(g[u], rhs[u])
+            key1 = m + h_base[u] + km
+            if _get_tag_nb(tag, u) == OPEN and k1[u] == key1 and k2[u] == m:
+                return size  # Already queued under this key
+            k1[u] = key1
+            k2[u] = m
+            _set_tag_nb(tag, u, OPEN)
+            return _heap_push(heap_k1, heap_k2, heap_idx, size, key1, m, u)
+        if _get_tag_nb(tag, u) == OPEN:
+            _set_tag_nb(tag, u, CLOSED)  # Consistent again; its heap entry is now stale
+        return size
+    
+    @njit(cache=True)
+    def _update_vertices_nb(nodes, g, rhs, k1, k2, tag, heap_k1, heap_k2, heap_idx, size,
+                            arc, W, h_base, goal, km, ndx, ndy, nrev):
+        """UpdateVertex over a batch of nodes; the heap must have room for one push per node"""
+        for i in range(nodes.shape[0]):
+            size = _update_vertex_nb(nodes[i], g, rhs, k1, k2, tag, heap_k1, heap_k2, heap_idx, size,
+                                     arc, W, h_base, goal, km, ndx, ndy, nrev)
+        return size
+    
+    @njit(cache=True)
+    def _compute_shortest_path_nb(g, rhs, k1, k2, tag, heap_k1, heap_k2, heap_idx, size, arc, W,
+                                  h_base, start, goal, km, max_steps, ndx, ndy, nrev):
+        """
+        Run D* Lite ComputeShortestPath until the start is locally consistent, the open
+        list empties or max_steps vertices were expanded
+        
+        Returns:
+            (heap_k1, heap_k2, heap_idx, heap size, done); the heap arrays are
+            reallocated when they run out of room
+        """
+        steps = 0
+        while size > 0 and steps < max_steps:
+            if size + 16 >= heap_k1.shape[0]:
+                # One expansion pushes at most 9 entries
+                heap_k1 = np.concatenate((heap_k1, np.empty(heap_k1.shape[0], dtype=heap_k1.dtype)))
+                heap_k2 = np.concatenate((heap_k2, np.empty(heap_k2.shape[0], dtype=heap_k2.dtype)))
+                heap_idx = np.concatenate((heap_idx, np.empty(heap_idx.shape[0], dtype=heap_idx.dtype)))
+            
+            top1 = heap_k1[0]
+            top2 = heap_k2[0]
+            u = heap_idx[0]
+            if _get_tag_nb(tag, u) != OPEN or top1 != k1[u] or top2 != k2[u]:
+                size = _heap_pop(heap_k1, heap_k2, heap_idx, size)
+                continue  # Stale entry superseded by a later insert (lazy deletion)
+            
+            # Stop once the start's key is no larger than the top key and the start is consistent
+            s2 = min(g[start], rhs[start])
+            s1 = s2 + km  # h(start, start) is zero
+            if not (_key_below_nb(top1, top2, s1, s2) or rhs[start] != g[start]):
+                return heap_k1, heap_k2, heap_idx, size, True
+            
+            size = _heap_pop(heap_k1, heap_k2, heap_idx, size)
+            m = min(g[u], rhs[u])
+            new1 = m + h_base[u] + km
+            if top1 < new1 or (top1 == new1 and top2 < m):
+                # Key went stale as km grew; requeue under the current key
+                k1[u] = new1
+                k2[u] = m
+                size = _heap_push(heap_k1, heap_k2, heap_idx, size, new1, m, u)
+                continue
+            
+            _set_tag_nb(tag, u, CLOSED)
+            if g[u] > rhs[u]:
+                # Overconsistent: settle g and relax the predecessors
+                g[u] = rhs[u]
+            else:
+                # Underconsistent: invalidate g and re-derive u and its predecessors
+                g[u] = np.inf
+                size = _update_vertex_nb(u, g, rhs, k1, k2, tag, heap_k1, heap_k2, heap_idx, size,
+                                         arc, W, h_base, goal, km, ndx, ndy, nrev)
+            for d in range(8):
+                if arc[u, d] == np.inf:
+                    continue
+                size = _update_vertex_nb(u + ndy[d] * W + ndx[d], g, rhs, k1, k2, tag,
+                                         heap_k1, heap_k2, heap_idx, size, arc, W, h_base, goal, km, ndx, ndy, nrev)
+            steps += 1
+        
+        return heap_k1, heap_k2, heap_idx, size, size == 0
 
 class DStarPathfinder:
+    # Static 8-neighbourhood offsets, same order as the compiled kernel
+    _DIRS = tuple(zip(_NEIGHBOR_DX.tolist(), _NEIGHBOR_DY.tolist()))
+    
     def __init__(self, grid_map: LibraryGridMap):
         """
-        Initialize D* pathfinder for dynamic environments
+        Initialize D* Lite pathfinder for dynamic environments
         
         Args:
             grid_map: LibraryGridMap instance for navigation
@@ -44,60 +247,130 @@ class DStarPathfinder:
         self.grid_map = grid_map
         self.goal_x = None
         self.goal_y = None
-        
-        # D* specific data structures
-        self.nodes: Dict[Tuple[int, int], DStarNode] = {}
-        self.open_list = []  # Priority queue
+        self._goal = -1
+        
+        # D* Lite vertex state as flat arrays (structure-of-arrays) indexed by y * W + x
+        self.W, self.H = grid_map.grid.shape[1], grid_map.grid.shape[0]
+        n = self.W * self.H
+        self.g = np.full(n, _INF)                  # Cost-to-goal estimate (inf until reached)
+        self.rhs = np.full(n, _INF)                # One-step lookahead on g
+        self.k1 = np.zeros(n, dtype=np.float64)    # Queued key, primary part
+        self.k2 = np.zeros(n, dtype=np.float64)    # Queued key, tie-break part
+        self.tag = np.zeros((n + 3) >> 2, dtype=np.uint8)  # Packed NEW / OPEN / CLOSED tags
+        self.km = 0.0                              # Key modifier accumulated as the start moves
+        self._last_start = -1                      # Start index the current keys are relative to
+        self._h_base = np.zeros(n, dtype=np.float64)  # Heuristic h(start, node) for every node
+        self._cell_y, self._cell_x = np.divmod(np.arange(n), self.W)
+        
+        # Arc costs per cell and direction, arc_cost[y, x, d] = step[d] * cost of the cell moved into
+        self.arc_cost = np.full((self.H, self.W, 8), _INF)
+        self._arc_flat = self.arc_cost.reshape(n, 8)  # View indexed by flat node index
+        self.open_list = []  # Priority queue of (k1, k2, index) for the Python path
+        
+        # Reusable (indices, directions) neighbour buffers for the Python path; _update_vertex
+        # runs inside neighbour loops, so it gets its own buffer
+        self._nbr_buf = ([0] * 8, [0] * 8)
+        self._succ_buf = ([0] * 8, [0] * 8)
+        
+        # Array heap for the compiled path
+        self._heap_k1 = np.empty(4 * n + 16, dtype=np.float64)
+        self._heap_k2 = np.empty(4 * n + 16, dtype=np.float64)
+        self._heap_idx = np.empty(4 * n + 16, dtype=np.int64)
+        self._heap_size = 0
         self.last_path = []
+        self._path_index = {}  # (x, y) -> position in last_path
         
         # Environment change tracking
-        self.cost_changes = []  # Track cost changes for replanning
+        self.cost_changes = np.empty(0, dtype=COST_CHANGE_DTYPE)  # Track cost changes for replanning
+        self._affected_nodes = np.empty(0, dtype=np.int64)  # Changed cells plus their free neighbours
+        self._current_costs = None  # Cost grid the pending changes were detected against
         self.last_grid_state = None
+        self.last_cost_state = None  # Cell costs at the last planning, compared against to find changes
+        self._last_seen_version = -1  # grid_map.version that last_cost_state reflects
         
         # Statistics
         self.replan_count = 0
         self.last_search_stats = {}
         
-        print("✅ D* Pathfinder initialized for dynamic environments")
+        logger.info("✅ D* Lite Pathfinder initialized for dynamic environments")
     
     def set_goal(self, goal_x: int, goal_y: int):
         """
-        Set goal position and initialize D* data structures
+        Set goal position and initialize D* Lite data structures
         
         Args:
             goal_x, goal_y: Goal coordinates in grid space
         """
         if not self.grid_map.is_valid_position(goal_x, goal_y):
-            print(f"❌ Invalid goal position: ({goal_x}, {goal_y})")
+            logger.warning("❌ Invalid goal position: (%d, %d)", goal_x, goal_y)
             return False
         
         self.goal_x = goal_x
         self.goal_y = goal_y
         
         # Reset all data structures
-        self.nodes.clear()
+        self.g.fill(_INF)
+        self.rhs.fill(_INF)
+        self.k1.fill(0.0)
+        self.k2.fill(0.0)
+        self.tag.fill(NEW * 0b01010101)
+        self.km = 0.0
+        self._last_start = -1
         self.open_list.clear()
-        self.cost_changes.clear()
+        self._heap_size = 0
+        self.cost_changes = np.empty(0, dtype=COST_CHANGE_DTYPE)
         self.replan_count = 0
         
-        # Initialize goal node
-        goal_node = self._get_or_create_node(goal_x, goal_y)
-        goal_node.cost = 0.0
-        goal_node.h = 0.0
-        goal_node.tag = NodeState.OPEN
-        goal_node.k = 0.0
-        
-        heapq.heappush(self.open_list, goal_node)
+        # Seed the search at the goal; its key is refreshed on the first pop once the start is known
+        goal = self._goal = self._get_or_create_node(goal_x, goal_y)
+        self.rhs[goal] = 0.0
+        self._set_tag(goal, OPEN)
+        self._push(self.k1[goal], self.k2[goal], goal)
         
         # Store initial grid state for change detection
         self.last_grid_state = self.grid_map.grid.copy()
+        self.last_cost_state = self.grid_map.get_cost_array()
+        self._last_seen_version = self.grid_map.version
+        self._build_arc_costs(self.last_cost_state)
         
-        print(f"✅ Goal set to ({goal_x}, {goal_y})")
+        logger.debug("✅ Goal set to (%d, %d)", goal_x, goal_y)
         return True
     
+    def _build_arc_costs(self, cell_costs: np.ndarray):
+        """
+        Fill the arc-cost tensor from a full cell-cost grid
+        
+        Args:
+            cell_costs: (H, W) traversal costs, inf for obstacles
+        """
+        costs = cell_costs.astype(np.float64)
+        self.arc_cost.fill(_INF)
+        for d in range(8):
+            dx, dy = int(_NEIGHBOR_DX[d]), int(_NEIGHBOR_DY[d])
+            # Source cells whose neighbour in direction d is inside the grid
+            src_y = slice(max(0, -dy), self.H - max(0, dy))
+            src_x = slice(max(0, -dx), self.W - max(0, dx))
+            dst_y = slice(max(0, dy), self.H - max(0, -dy))
+            dst_x = slice(max(0, dx), self.W - max(0, -dx))
+            self.arc_cost[src_y, src_x, d] = _NEIGHBOR_STEP[d] * costs[dst_y, dst_x]
+    
+    def _update_arc_costs(self, xs: np.ndarray, ys: np.ndarray, new_costs: np.ndarray):
+        """
+        Refresh only the arcs that move into changed cells
+        
+        Args:
+            xs, ys: Coordinates of the changed cells
+            new_costs: New traversal cost of each changed cell
+        """
+        for d in range(8):
+            src_x = xs - _NEIGHBOR_DX[d]
+            src_y = ys - _NEIGHBOR_DY[d]
+            inside = (src_x >= 0) & (src_x < self.W) & (src_y >= 0) & (src_y < self.H)
+            self.arc_cost[src_y[inside], src_x[inside], d] = _NEIGHBOR_STEP[d] * new_costs[inside]
+    
     def find_path(self, start_x: int, start_y: int, timeout: float = 10.0) -> Optional[List[Tuple[int, int]]]:
         """
-        Find path using D* algorithm
+        Find path using D* Lite
         
         Args:
             start_x, start_y: Starting coordinates
@@ -107,39 +380,51 @@ class DStarPathfinder:
             Path as list of (x, y) coordinates, or None if no path
         """
         if self.goal_x is None or self.goal_y is None:
-            print("❌ Goal not set. Call set_goal() first.")
+            logger.warning("❌ Goal not set. Call set_goal() first.")
             return None
         
         if not self.grid_map.is_valid_position(start_x, start_y):
-            print(f"❌ Invalid start position: ({start_x}, {start_y})")
+            logger.warning("❌ Invalid start position: (%d, %d)", start_x, start_y)
             return None
         
         start_time = time.time()
+        self._path_index = {}
+        
+        # Keys are relative to the start; when it moves, raise km instead of re-keying the queue
+        start = self._get_or_create_node(start_x, start_y)
+        if start != self._last_start:
+            if self._last_start != -1:
+                self.km += self._h_base[start]  # h(last_start, start), still relative to the old start
+            self._build_heuristic(start_x, start_y)
+            self._last_start = start
         
         # Check for environment changes and replan if necessary
         if self._detect_environment_changes():
             self._handle_environment_changes()
         
-        # Process open list until start node is optimal
-        start_node = self._get_or_create_node(start_x, start_y)
-        
-        while self.open_list and (time.time() - start_time) < timeout:
-            if self._process_state() == -1:
-                break
-            
-            # Check if start node is optimally processed
-            if start_node.tag == NodeState.CLOSED and start_node.cost < float('inf'):
-                break
+        # Expand vertices until the start is locally consistent
+        if NUMBA_AVAILABLE:
+            # Compiled kernel expands vertices in slices so the timeout is still honoured
+            done = False
+            while not done and (time.time() - start_time) < timeout:
+                self._heap_k1, self._heap_k2, self._heap_idx, self._heap_size, done = _compute_shortest_path_nb(
+                    self.g, self.rhs, self.k1, self.k2, self.tag,
+                    self._heap_k1, self._heap_k2, self._heap_idx, self._heap_size, self._arc_flat, self.W,
+                    self._h_base, start, self._goal, self.km, 4096, _NEIGHBOR_DX, _NEIGHBOR_DY, _REVERSE_DIR_ARR
+                )
+        else:
+            self._compute_shortest_path(start, start_time, timeout)
         
         # Reconstruct path
-        if start_node.cost < float('inf'):
+        if self.g[start] < _INF:
             path = self._extract_path(start_x, start_y)
             self.last_path = path
+            self._path_index = {p: i for i, p in enumerate(path)}
             
             # Store statistics
             self.last_search_stats = {
                 'path_length': len(path) if path else 0,
-                'path_cost': start_node.cost,
+                'path_cost': float(self.g[start]),
                 'search_time': time.time() - start_time,
                 'replan_count': self.replan_count,
                 'success': True
@@ -158,137 +443,176 @@ class DStarPathfinder:
             
             return None
     
-    def _process_state(self) -> int:
+    def _compute_shortest_path(self, start: int, start_time: float, timeout: float):
         """
-        Process one state from the open list
+        D* Lite ComputeShortestPath: expand vertices until the start is locally consistent
         
-        Returns:
-            -1 if open list is empty, k_old otherwise
+        Args:
+            start: Flat index of the start node
+            start_time: time.time() at the start of the search
+            timeout: Maximum search time
         """
-        if not self.open_list:
-            return -1
-        
-        # Get node with minimum k value
-        current = heapq.heappop(self.open_list)
-        current.tag = NodeState.CLOSED
-        
-        k_old = current.k
-        
-        if k_old < current.h:
-            # RAISE state: cost increased
-            neighbors = self._get_neighbors(current.x, current.y)
+        g, rhs = self.g, self.rhs
+        open_list = self.open_list
+        
+        while open_list and (time.time() - start_time) < timeout:
+            top1, top2, u = open_list[0]
+            if self._get_tag(u) != OPEN or top1 != self.k1[u] or top2 != self.k2[u]:
+                heapq.heappop(open_list)
+                continue  # Stale entry superseded by a later insert (lazy deletion)
             
-            for neighbor in neighbors:
-                if neighbor.h <= k_old and current.h > neighbor.h + self._get_arc_cost(neighbor, current):
-                    current.parent = neighbor
-                    current.h = neighbor.h + self._get_arc_cost(neighbor, current)
-        
-        elif k_old == current.h:
-            # LOWER state: cost decreased or optimal
-            neighbors = self._get_neighbors(current.x, current.y)
+            # Stop once the start's key is no larger than the top key and the start is consistent
+            s1, s2 = self._calculate_key(start)
+            if not (_key_below(top1, top2, s1, s2) or rhs[start] != g[start]):
+                return
             
-            for neighbor in neighbors:
-                arc_cost = self._get_arc_cost(current, neighbor)
-                
-                if neighbor.tag == NodeState.NEW or \
-                   (neighbor.parent == current and neighbor.h != current.h + arc_cost) or \
-                   (neighbor.parent != current and neighbor.h > current.h + arc_cost):
-                    
-                    neighbor.parent = current
-                    self._insert_node(neighbor, current.h + arc_cost)
-        
-        else:
-            # k_old > current.h: RAISE state
-            neighbors = self._get_neighbors(current.x, current.y)
+            heapq.heappop(open_list)
+            new1, new2 = self._calculate_key(u)
+            if (top1, top2) < (new1, new2):
+                # Key went stale as km grew; requeue under the current key
+                self.k1[u], self.k2[u] = new1, new2
+                heapq.heappush(open_list, (new1, new2, u))
+                continue
             
-            for neighbor in neighbors:
-                arc_cost = self._get_arc_cost(current, neighbor)
-                
-                if neighbor.tag == NodeState.NEW or \
-                   (neighbor.parent == current and neighbor.h != current.h + arc_cost):
-                    
-                    neighbor.parent = current
-                    self._insert_node(neighbor, current.h + arc_cost)
-                else:
-                    if neighbor.parent != current and neighbor.h > current.h + arc_cost:
-                        self._insert_node(current, current.h)
-                    else:
-                        if neighbor.parent != current and current.h > neighbor.h + self._get_arc_cost(neighbor, current) and \
-                           neighbor.tag == NodeState.CLOSED and neighbor.h > k_old:
-                            self._insert_node(neighbor, neighbor.h)
-        
-        return k_old
-    
-    def _get_neighbors(self, x: int, y: int) -> List['DStarNode']:
-        """Get neighboring nodes"""
-        neighbor_coords = self.grid_map.get_neighbors(x, y, include_diagonal=True)
-        neighbors = []
-        
-        for nx, ny in neighbor_coords:
-            neighbor_node = self._get_or_create_node(nx, ny)
-            neighbors.append(neighbor_node)
-        
-        return neighbors
-    
-    def _get_arc_cost(self, from_node: 'DStarNode', to_node: 'DStarNode') -> float:
-        """Calculate cost of moving between two nodes"""
-        # Check if destination is valid
-        if not self.grid_map.is_valid_position(to_node.x, to_node.y):
-            return float('inf')
-        
-        # Base movement cost (Euclidean distance)
-        dx = abs(to_node.x - from_node.x)
-        dy = abs(to_node.y - from_node.y)
-        
-        if dx == 1 and dy == 1:
-            base_cost = math.sqrt(2)  # Diagonal
-        else:
-            base_cost = 1.0  # Orthogonal
-        
-        # Add traversal cost from grid
-        traversal_cost = self.grid_map.get_cost(to_node.x, to_node.y)
+            self._set_tag(u, CLOSED)
+            if g[u] > rhs[u]:
+                # Overconsistent: settle g and relax the predecessors
+                g[u] = rhs[u]
+            else:
+                # Underconsistent: invalidate g and re-derive u and its predecessors
+                g[u] = _INF
+                self._update_vertex(u)
+            nbrs = self._nbr_buf[0]
+            for i in range(self._get_neighbors(u, self._nbr_buf)):
+                self._update_vertex(nbrs[i])
+    
+    def _build_heuristic(self, start_x: int, start_y: int):
+        """
+        Fill h(start, node) for every node in one pass: octile distance
+        (admissible since cell costs are >= 1)
         
-        return base_cost * traversal_cost
+        Args:
+            start_x, start_y: Start coordinates the keys are relative to
+        """
+        dx = np.abs(self._cell_x - start_x)
+        dy = np.abs(self._cell_y - start_y)
+        lo = np.minimum(dx, dy)
+        self._h_base[:] = (np.maximum(dx, dy) - lo) + _SQRT2 * lo
     
-    def _get_or_create_node(self, x: int, y: int) -> 'DStarNode':
-        """Get existing node or create new one"""
-        key = (x, y)
-        if key not in self.nodes:
-            self.nodes[key] = DStarNode(x, y)
-        return self.nodes[key]
+    def _calculate_key(self, index: int) -> Tuple[float, float]:
+        """D* Lite priority of a node: (min(g, rhs) + h(start, node) + km, min(g, rhs))"""
+        m = min(self.g[index], self.rhs[index])
+        return m + self._h_base[index] + self.km, m
     
-    def _insert_node(self, node: 'DStarNode', h_new: float):
-        """Insert node into open list with new h value"""
-        if node.tag == NodeState.NEW:
-            node.k = h_new
-        elif node.tag == NodeState.OPEN:
-            node.k = min(node.k, h_new)
-        elif node.tag == NodeState.CLOSED:
-            node.k = min(node.h, h_new)
-        
-        node.h = h_new
-        node.tag = NodeState.OPEN
+    def _update_vertex(self, index: int):
+        """Recompute a node's rhs and (re)queue it if it is locally inconsistent"""
+        if index != self._goal:
+            # One-step lookahead over the successors
+            g, arcs = self.g, self._arc_flat
+            nbrs, dirs = self._succ_buf
+            best = _INF
+            for i in range(self._get_neighbors(index, self._succ_buf)):
+                neighbor = nbrs[i]
+                value = arcs[neighbor, _REVERSE_DIR[dirs[i]]] + g[neighbor]
+                if value < best:
+                    best = value
+            self.rhs[index] = best
+        
+        if self.g[index] != self.rhs[index]:
+            key1, key2 = self._calculate_key(index)
+            if self._get_tag(index) == OPEN and self.k1[index] == key1 and self.k2[index] == key2:
+                return  # Already queued under this key
+            self.k1[index], self.k2[index] = key1, key2
+            self._set_tag(index, OPEN)
+            self._push(key1, key2, index)
+        elif self._get_tag(index) == OPEN:
+            self._set_tag(index, CLOSED)  # Consistent again; its heap entry is now stale
+    
+    def _get_tag(self, index: int) -> int:
+        """Read a node's 2-bit NEW / OPEN / CLOSED tag"""
+        return (int(self.tag[index >> 2]) >> ((index & 3) << 1)) & _TAG_MASK
+    
+    def _set_tag(self, index: int, value: int):
+        """Write a node's 2-bit tag, leaving the other three nodes in its byte alone"""
+        shift = (index & 3) << 1
+        self.tag[index >> 2] = (int(self.tag[index >> 2]) & ~(_TAG_MASK << shift)) | (value << shift)
+    
+    def _get_neighbors(self, index: int, buf: Tuple[List[int], List[int]]) -> int:
+        """
+        Write neighbouring nodes (in bounds and not obstacles) into a reusable buffer
         
-        heapq.heappush(self.open_list, node)
+        Args:
+            index: Flat node index
+            buf: (indices, directions) lists of length 8, overwritten in place
+            
+        Returns:
+            Number of neighbours written
+        """
+        W, H = self.W, self.H
+        x, y = index % W, index // W
+        grid = self.grid_map.grid
+        obstacle = CellType.OBSTACLE.value
+        nbrs, dirs = buf
+        
+        count = 0
+        for d, (dx, dy) in enumerate(self._DIRS):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < W and 0 <= ny < H and grid[ny, nx] != obstacle:
+                nbrs[count] = ny * W + nx
+                dirs[count] = d
+                count += 1
+        return count
+    
+    def _get_or_create_node(self, x: int, y: int) -> int:
+        """Flat node index for a grid cell (all nodes are preallocated)"""
+        return y * self.W + x
+    
+    def _push(self, key1: float, key2: float, index: int):
+        """Push an open-list entry onto whichever heap the active search path uses"""
+        if NUMBA_AVAILABLE:
+            self._reserve_heap(1)
+            self._heap_size = _heap_push(self._heap_k1, self._heap_k2, self._heap_idx, self._heap_size,
+                                         key1, key2, index)
+        else:
+            heapq.heappush(self.open_list, (key1, key2, index))
+    
+    def _reserve_heap(self, extra: int):
+        """Grow the compiled path's heap arrays so at least `extra` more entries fit"""
+        capacity = len(self._heap_k1)
+        if self._heap_size + extra <= capacity:
+            return
+        grow = max(capacity, self._heap_size + extra - capacity)
+        self._heap_k1 = np.concatenate((self._heap_k1, np.empty(grow, dtype=np.float64)))
+        self._heap_k2 = np.concatenate((self._heap_k2, np.empty(grow, dtype=np.float64)))
+        self._heap_idx = np.concatenate((self._heap_idx, np.empty(grow, dtype=np.int64)))
     
     def _extract_path(self, start_x: int, start_y: int) -> List[Tuple[int, int]]:
-        """Extract path from start to goal"""
+        """Extract path from start to goal by following the cheapest arc + g successor"""
         path = []
+        W = self.W
+        g, arcs = self.g, self._arc_flat
         current = self._get_or_create_node(start_x, start_y)
         
-        visited = set()
-        while current is not None:
-            if (current.x, current.y) in visited:
-                print("⚠️ Cycle detected in path extraction")
+        # g strictly decreases along the descent on a converged search, so a path can't
+        # exceed the node count; the bound only stops a cycle left by a timed-out search
+        for _ in range(self.W * self.H):
+            path.append((current % W, current // W))
+            
+            if current == self._goal:
                 break
             
-            visited.add((current.x, current.y))
-            path.append((current.x, current.y))
+            node, best, current = current, _INF, -1
+            nbrs, dirs = self._nbr_buf
+            for i in range(self._get_neighbors(node, self._nbr_buf)):
+                neighbor = nbrs[i]
+                value = arcs[neighbor, _REVERSE_DIR[dirs[i]]] + g[neighbor]
+                if value < best:
+                    best, current = value, neighbor
             
-            if current.x == self.goal_x and current.y == self.goal_y:
+            if current == -1:
                 break
-            
-            current = current.parent
+        else:
+            logger.debug("⚠️ Cycle detected in path extraction")
         
         return path
     
@@ -297,52 +621,109 @@ class DStarPathfinder:
         if self.last_grid_state is None:
             return False
         
-        # Compare current grid with stored state
-        current_grid = self.grid_map.grid
-        changes_detected = not np.array_equal(current_grid, self.last_grid_state)
+        # Grid untouched since the last check, nothing to diff
+        if self.grid_map.version == self._last_seen_version:
+            return False
         
-        if changes_detected:
-            # Find specific changes
-            diff_mask = current_grid != self.last_grid_state
-            changed_positions = np.where(diff_mask)
-            
-            self.cost_changes = []
-            for i in range(len(changed_positions[0])):
-                y, x = changed_positions[0][i], changed_positions[1][i]
-                old_cost = self.grid_map.get_cost(x, y) if self.last_grid_state[y, x] != CellType.OBSTACLE.value else float('inf')
-                new_cost = self.grid_map.get_cost(x, y)
-                
-                if old_cost != new_cost:
-                    self.cost_changes.append((x, y, old_cost, new_cost))
-            
-            print(f"🔄 Environment changes detected: {len(self.cost_changes)} cost changes")
-            
-        return changes_detected
+        # Compare current cell costs with the stored state in one pass
+        current_costs = self.grid_map.get_cost_array()
+        diff = current_costs != self.last_cost_state
+        if not diff.any():
+            self._last_seen_version = self.grid_map.version
+            return False
+        
+        # Gather changed cells and their old/new costs without per-cell lookups
+        ys, xs = np.nonzero(diff)
+        self.cost_changes = np.empty(len(xs), dtype=COST_CHANGE_DTYPE)
+        self.cost_changes['x'] = xs
+        self.cost_changes['y'] = ys
+        self.cost_changes['old'] = self.last_cost_state[ys, xs]
+        self.cost_changes['new'] = current_costs[ys, xs]
+        self._current_costs = current_costs
+        
+        # In the same pass, collect every vertex the changes touch: a changed cell alters its
+        # own rhs and every arc into it, so its free neighbours need UpdateVertex too
+        H, W = self.H, self.W
+        padded = np.zeros((H + 2, W + 2), dtype=bool)
+        padded[1:-1, 1:-1] = diff
+        near = diff.copy()
+        for d in range(8):
+            # Cell (y, x) is affected if its neighbour (y + dy, x + dx) changed
+            near |= padded[1 + _NEIGHBOR_DY[d]:1 + _NEIGHBOR_DY[d] + H, 1 + _NEIGHBOR_DX[d]:1 + _NEIGHBOR_DX[d] + W]
+        self._affected_nodes = np.flatnonzero(diff | (near & (current_costs != _INF)))
+        
+        logger.debug("🔄 Environment changes detected: %d cost changes", len(self.cost_changes))
+        
+        return True
     
     def _handle_environment_changes(self):
         """Handle detected environment changes by updating affected nodes"""
         self.replan_count += 1
         
-        # Process each cost change
-        for x, y, old_cost, new_cost in self.cost_changes:
-            node = self._get_or_create_node(x, y)
-            
-            # If cost increased, we may need to propagate changes
-            if new_cost > old_cost:
-                neighbors = self._get_neighbors(x, y)
-                
-                for neighbor in neighbors:
-                    if neighbor.parent == node:
-                        # This neighbor's parent has increased cost
-                        self._insert_node(neighbor, neighbor.h)
+        changes = self.cost_changes
+        current_costs = self._current_costs
+        
+        if len(changes) > _FULL_REPLAN_FRACTION * self.W * self.H:
+            # Large change: rebuild everything in whole-array passes instead of per vertex
+            self._build_arc_costs(current_costs)
+            self._recompute_g_vectorized(current_costs)
+        else:
+            # Refresh the arcs leading into changed cells before any vertex is updated
+            self._update_arc_costs(changes['x'].astype(np.int64), changes['y'].astype(np.int64), changes['new'])
             
-            # If cost decreased, we may have found better paths
-            elif new_cost < old_cost:
-                if node.tag == NodeState.CLOSED:
-                    self._insert_node(node, node.h)
+            # One batched UpdateVertex over the vertices collected during detection
+            nodes = self._affected_nodes
+            if NUMBA_AVAILABLE:
+                self._reserve_heap(len(nodes))
+                self._heap_size = _update_vertices_nb(
+                    nodes, self.g, self.rhs, self.k1, self.k2, self.tag,
+                    self._heap_k1, self._heap_k2, self._heap_idx, self._heap_size, self._arc_flat, self.W,
+                    self._h_base, self._goal, self.km, _NEIGHBOR_DX, _NEIGHBOR_DY, _REVERSE_DIR_ARR
+                )
+            else:
+                for node in nodes.tolist():
+                    self._update_vertex(node)
         
         # Update stored grid state
         self.last_grid_state = self.grid_map.grid.copy()
+        self.last_cost_state = current_costs
+        self._last_seen_version = self.grid_map.version
+    
+    def _recompute_g_vectorized(self, cell_costs: np.ndarray):
+        """
+        Recompute g for every cell with a whole-grid Dijkstra wavefront from the goal
+        
+        Relaxes g(u) = min over directions of step * cost(u) + g(neighbor) on shifted
+        copies of the grid until nothing changes, then marks every vertex consistent
+        
+        Args:
+            cell_costs: (H, W) traversal costs, inf for obstacles
+        """
+        H, W = self.H, self.W
+        goal_y, goal_x = divmod(self._goal, W)
+        
+        # g padded with an inf border so the shifted views need no bounds handling
+        padded = np.full((H + 2, W + 2), _INF)
+        g = padded[1:-1, 1:-1]
+        g[goal_y, goal_x] = 0.0
+        
+        steps = [_NEIGHBOR_STEP[d] * cell_costs.astype(np.float64) for d in range(8)]
+        while True:
+            relaxed = np.minimum.reduce([
+                steps[d] + padded[1 + _NEIGHBOR_DY[d]:1 + _NEIGHBOR_DY[d] + H, 1 + _NEIGHBOR_DX[d]:1 + _NEIGHBOR_DX[d] + W]
+                for d in range(8)
+            ])
+            relaxed[goal_y, goal_x] = 0.0
+            if np.array_equal(relaxed, g):
+                break
+            g[:] = relaxed
+        
+        # Every vertex is now locally consistent, so nothing is left to queue
+        self.g[:] = g.ravel()
+        self.rhs[:] = self.g
+        self.tag.fill(CLOSED * 0b01010101)  # CLOSED in all four lanes of every byte
+        self.open_list.clear()
+        self._heap_size = 0
     
     def replan_if_needed(self, current_x: int, current_y: int) -> Optional[List[Tuple[int, int]]]:
         """
@@ -355,7 +736,7 @@ class DStarPathfinder:
             Updated path if replanning occurred, None if no replanning needed
         """
         if self._detect_environment_changes():
-            print("🔄 Replanning due to environment changes...")
+            logger.debug("🔄 Replanning due to environment changes...")
             return self.find_path(current_x, current_y)
         
         return None
@@ -374,15 +755,13 @@ class DStarPathfinder:
             return None
         
         # Find current position in path
-        current_pos = (current_x, current_y)
+        current_index = self._path_index.get((current_x, current_y))
         
-        try:
-            current_index = self.last_path.index(current_pos)
-            if current_index < len(self.last_path) - 1:
-                return self.last_path[current_index + 1]
-        except ValueError:
+        if current_index is None:
             # Current position not in path - might need replanning
-            print("⚠️ Current position not in planned path")
+            logger.debug("⚠️ Current position not in planned path")
+        elif current_index < len(self.last_path) - 1:
+            return self.last_path[current_index + 1]
         
         return None
     
@@ -393,6 +772,8 @@ class DStarPathfinder:
 
 # Test D* pathfinder
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logger.setLevel(logging.DEBUG)
     print("Testing D* Pathfinder...")
     
     # Create test environment
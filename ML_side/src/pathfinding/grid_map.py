@@ -9,6 +9,13 @@ from dataclasses import dataclass
 from enum import Enum
 import cv2
 
+# Numba is optional; without it neighbour expansion runs as plain Python
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 class CellType(Enum):
     FREE = 0
     OBSTACLE = 1
@@ -17,6 +24,104 @@ class CellType(Enum):
     START = 4
     PATH = 5
 
+# Per-class (base traversal cost, blocks movement)
+_CLASS_TABLE = {
+    'office-chair': (10.0, True),   # High cost - difficult to move
+    'table': (15.0, True),          # Very high - large obstacle
+    'books': (8.0, True),           # Medium - might be moveable
+    'whiteboard': (20.0, True),     # Extremely high - large, fixed
+    'monitor': (3.0, False),        # Low - might navigate around/under
+    'tv': (4.0, False)              # Low-medium - larger than monitor
+}
+_DEFAULT = (5.0, False)
+
+# Neighbour offsets: 4-connected first, then diagonals (planners rely on this order)
+_DIRS4 = ((0, 1), (0, -1), (1, 0), (-1, 0))
+_DIRS8 = _DIRS4 + ((1, 1), (1, -1), (-1, 1), (-1, -1))
+_NEIGHBOR_DX = np.array([dx for dx, _ in _DIRS8], dtype=np.int64)
+_NEIGHBOR_DY = np.array([dy for _, dy in _DIRS8], dtype=np.int64)
+_OBSTACLE = CellType.OBSTACLE.value
+
+def _neighbors_nb(grid, gx, gy, n_dirs, out):
+    """Write the first n_dirs in-bounds, non-obstacle neighbours of (gx, gy) into out; returns the count"""
+    height, width = grid.shape
+    count = 0
+    for d in range(n_dirs):
+        x = gx + _NEIGHBOR_DX[d]
+        y = gy + _NEIGHBOR_DY[d]
+        if 0 <= x < width and 0 <= y < height and grid[y, x] != _OBSTACLE:
+            out[count, 0] = x
+            out[count, 1] = y
+            count += 1
+    return count
+
+# Visualization colour per cell type, indexed by grid value
+_COLOR_LUT = np.zeros((len(CellType), 3), dtype=np.uint8)
+_COLOR_LUT[CellType.FREE.value] = (255, 255, 255)      # White
+_COLOR_LUT[CellType.OBSTACLE.value] = (0, 0, 0)        # Black
+_COLOR_LUT[CellType.UNKNOWN.value] = (128, 128, 128)   # Gray
+_COLOR_LUT[CellType.GOAL.value] = (0, 255, 0)          # Green
+_COLOR_LUT[CellType.START.value] = (0, 0, 255)         # Blue
+_COLOR_LUT[CellType.PATH.value] = (255, 0, 0)          # Red
+
+_ALL_BITS = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+def _run_clear(bits, y, xa, xb):
+    """True if cells xa..xb (inclusive) of row y are all clear, testing up to 64 cells per word"""
+    for w in range(xa >> 6, (xb >> 6) + 1):
+        lo = max(xa - (w << 6), 0)
+        hi = min(xb - (w << 6), 63)
+        mask = (_ALL_BITS >> np.uint64(63 - (hi - lo))) << np.uint64(lo)
+        if bits[y, w] & mask:
+            return False
+    return True
+
+def line_clear(bits, width, x0, y0, x1, y1):
+    """
+    4-connected Bresenham walk from (x0, y0) to (x1, y1) over a packed obstacle bitmap
+    
+    The walk is split into horizontal runs, each tested a word at a time
+    
+    Args:
+        bits: uint64 array of shape (H, ceil(W / 64)), bit x % 64 of word x // 64 set for obstacles
+        width: Grid width in cells
+        x0, y0, x1, y1: Endpoints in grid coordinates
+        
+    Returns:
+        False if the walk leaves the grid or touches an obstacle
+    """
+    height = bits.shape[0]
+    # Every cell of the walk lies in the endpoints' bounding box
+    if (x0 < 0 or x0 >= width or y0 < 0 or y0 >= height or
+            x1 < 0 or x1 >= width or y1 < 0 or y1 >= height):
+        return False
+    
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    x_inc = 1 if x1 > x0 else -1
+    y_inc = 1 if y1 > y0 else -1
+    error = dx - dy
+    x = x0
+    y = y0
+    run_start = x0
+    while x != x1 or y != y1:
+        if error > 0:
+            x += x_inc
+            error -= dy
+        else:
+            # Leaving this row, so test the run just walked
+            if not _run_clear(bits, y, min(run_start, x), max(run_start, x)):
+                return False
+            y += y_inc
+            error += dx
+            run_start = x
+    return _run_clear(bits, y, min(run_start, x), max(run_start, x))
+
+if NUMBA_AVAILABLE:
+    _neighbors_nb = njit(cache=True)(_neighbors_nb)
+    _run_clear = njit(cache=True)(_run_clear)
+    line_clear = njit(cache=True)(line_clear)
+
 @dataclass
 class GridCell:
     x: int
@@ -49,8 +154,32 @@ class LibraryGridMap:
         self.cost_grid = np.ones((self.grid_height, self.grid_width), dtype=np.float32)
         self.confidence_grid = np.ones((self.grid_height, self.grid_width), dtype=np.float32)
         
-        # Semantic information storage
-        self.semantic_cells = {}  # (x, y) -> semantic info
+        # Bumped on every mutation that can change cell costs, so planners can skip re-diffing
+        self.version = 0
+        
+        # Chebyshev distance to the nearest blocked cell, rebuilt lazily per version.
+        # Both buffers carry a one-cell border; the mask's border stays 0 (blocked)
+        self._clearance_mask = np.zeros((self.grid_height + 2, self.grid_width + 2), dtype=np.uint8)
+        self._clearance_full = np.zeros((self.grid_height + 2, self.grid_width + 2), dtype=np.float32)
+        self._clearance = self._clearance_full[1:-1, 1:-1]
+        self._clearance_version = -1
+        
+        # Reusable full-grid buffers for per-frame updates
+        self._tmp_bool1 = np.empty((self.grid_height, self.grid_width), dtype=bool)
+        self._tmp_bool2 = np.empty((self.grid_height, self.grid_width), dtype=bool)
+        self._inflated_u8 = np.empty((self.grid_height, self.grid_width), dtype=np.uint8)
+        self._inflation_kernel = None
+        self._obstacle_u8 = np.empty((self.grid_height, self.grid_width), dtype=np.uint8)
+        self._nbr_buf = np.empty((8, 2), dtype=np.int32)
+        
+        # Obstacle cells packed 64 per word along each row, repacked lazily per version
+        self._obstacle_bits = np.zeros((self.grid_height, (self.grid_width + 63) // 64), dtype=np.uint64)
+        self._obstacle_bytes = self._obstacle_bits.view(np.uint8)  # little-endian word layout
+        self._obstacle_bits_version = -1
+        
+        # Semantic information storage, one entry per detection
+        self.detections_list = []  # Semantic info dicts in ingest order
+        self.semantic_id_grid = np.full((self.grid_height, self.grid_width), -1, dtype=np.int32)  # Index into detections_list, -1 if none
         
         # Navigation parameters
         self.obstacle_inflation_radius = 2  # Grid cells to inflate around obstacles
@@ -69,6 +198,12 @@ class LibraryGridMap:
         
         return grid_x, grid_y
     
+    def pixel_to_grid_batch(self, pixel_x: np.ndarray, pixel_y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized pixel_to_grid over arrays of coordinates (same truncation and clamping)"""
+        grid_x = np.clip((np.asarray(pixel_x, dtype=np.float64) / self.resolution).astype(np.int64), 0, self.grid_width - 1)
+        grid_y = np.clip((np.asarray(pixel_y, dtype=np.float64) / self.resolution).astype(np.int64), 0, self.grid_height - 1)
+        return grid_x, grid_y
+    
     def grid_to_pixel(self, grid_x: int, grid_y: int) -> Tuple[float, float]:
         """Convert grid coordinates to pixel coordinates (center of cell)"""
         pixel_x = (grid_x + 0.5) * self.resolution
@@ -81,110 +216,125 @@ class LibraryGridMap:
         
         Args:
             detections: List of detection dictionaries with bbox info
-            clear_previous: Whether to clear previous obstacle information
+            clear_previous: Whether to clear previous obstacle and semantic information
         """
         if clear_previous:
             self.grid.fill(CellType.FREE.value)
             self.cost_grid.fill(1.0)
             self.confidence_grid.fill(1.0)
+            self.semantic_id_grid.fill(-1)
+            self.detections_list = []
         
-        for detection in detections:
-            self._add_detection_to_grid(detection)
+        if detections:
+            self._add_detections_to_grid(detections)
         
         # Apply obstacle inflation for safety
         self._inflate_obstacles()
+        self.version += 1
     
-    def _add_detection_to_grid(self, detection: Dict):
-        """Add single detection to grid map"""
-        bbox = detection['bbox']
-        confidence = detection['confidence']
-        class_name = detection['class_name']
-        
-        # Convert bbox to grid coordinates
-        x1, y1 = self.pixel_to_grid(bbox['x1'], bbox['y1'])
-        x2, y2 = self.pixel_to_grid(bbox['x2'], bbox['y2'])
-        
-        # Ensure proper ordering
-        x1, x2 = min(x1, x2), max(x1, x2)
-        y1, y2 = min(y1, y2), max(y1, y2)
-        
-        # Determine obstacle type and cost
-        obstacle_cost = self._get_obstacle_cost(class_name, confidence)
-        is_obstacle = self._is_obstacle_class(class_name)
-        
-        # Fill grid cells
-        for y in range(y1, y2 + 1):
-            for x in range(x1, x2 + 1):
-                if 0 <= x < self.grid_width and 0 <= y < self.grid_height:
-                    if is_obstacle:
-                        self.grid[y, x] = CellType.OBSTACLE.value
-                        self.cost_grid[y, x] = obstacle_cost
-                    else:
-                        # Non-obstacle objects increase traversal cost but don't block
-                        self.cost_grid[y, x] = max(self.cost_grid[y, x], obstacle_cost * 0.5)
-                    
-                    self.confidence_grid[y, x] = confidence
-                    
-                    # Store semantic information
-                    self.semantic_cells[(x, y)] = {
-                        'class_name': class_name,
-                        'confidence': confidence,
-                        'detection_data': detection
-                    }
-    
-    def _is_obstacle_class(self, class_name: str) -> bool:
-        """Determine if object class should be treated as obstacle"""
-        # Objects that block movement
-        obstacle_classes = {
-            'office-chair', 'table', 'books', 'whiteboard'
-        }
-        
-        # Objects that are landmarks but not obstacles
-        non_obstacle_classes = {
-            'monitor', 'tv'  # Can potentially navigate around/under
-        }
-        
-        return class_name in obstacle_classes
-    
-    def _get_obstacle_cost(self, class_name: str, confidence: float) -> float:
-        """Calculate traversal cost for different object types"""
-        base_costs = {
-            'office-chair': 10.0,  # High cost - difficult to move
-            'table': 15.0,        # Very high - large obstacle
-            'books': 8.0,         # Medium - might be moveable
-            'whiteboard': 20.0,   # Extremely high - large, fixed
-            'monitor': 3.0,       # Low - might navigate around
-            'tv': 4.0            # Low-medium - larger than monitor
-        }
+    def _add_detections_to_grid(self, detections: List[Dict]):
+        """
+        Add a batch of detections to the grid map
         
-        base_cost = base_costs.get(class_name, 5.0)
+        The result is the same as adding the detections one after another: obstacles
+        overwrite the cost of the cells they cover, non-obstacles only raise it, and
+        the last detection covering a cell sets its confidence
+        """
+        # Convert all bboxes to clamped grid coordinates at once
+        boxes = np.array([[d['bbox']['x1'], d['bbox']['y1'], d['bbox']['x2'], d['bbox']['y2']]
+                          for d in detections], dtype=np.float64)
+        gx, gy = self.pixel_to_grid_batch(boxes[:, 0::2], boxes[:, 1::2])
+        x1, x2 = gx.min(axis=1), gx.max(axis=1)
+        y1, y2 = gy.min(axis=1), gy.max(axis=1)
+        
+        # Per-detection cost, obstacle flag and confidence
+        confidences = [d['confidence'] for d in detections]
+        classes = [_CLASS_TABLE.get(d['class_name'], _DEFAULT) for d in detections]
+        base_costs = np.array([base_cost for base_cost, _ in classes])
+        is_obstacle = np.array([obstacle for _, obstacle in classes], dtype=bool)
         
         # Scale by confidence - higher confidence = higher cost
-        confidence_factor = 0.5 + (confidence * 1.5)
+        costs = base_costs * (0.5 + np.asarray(confidences, dtype=np.float64) * 1.5)
+        
+        # Store semantic information
+        first_id = len(self.detections_list)
+        self.detections_list.extend(
+            {
+                'class_name': d['class_name'],
+                'confidence': c,
+                'detection_data': d
+            }
+            for d, c in zip(detections, confidences)
+        )
+        
+        # Paint each box in order with OpenCV's filled rectangles, so later
+        # detections overwrite earlier ones exactly as sequential adds would
+        self._obstacle_u8.fill(0)
+        half_costs = (costs * 0.5).astype(np.float32)
+        for i, (bx1, by1, bx2, by2) in enumerate(zip(x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist())):
+            pt1, pt2 = (bx1, by1), (bx2, by2)
+            if is_obstacle[i]:
+                cv2.rectangle(self._obstacle_u8, pt1, pt2, 1, thickness=-1)
+                cv2.rectangle(self.cost_grid, pt1, pt2, float(costs[i]), thickness=-1)
+            else:
+                # Non-obstacles increase traversal cost but don't block
+                region = self.cost_grid[by1:by2 + 1, bx1:bx2 + 1]
+                np.maximum(region, half_costs[i], out=region)
+            cv2.rectangle(self.confidence_grid, pt1, pt2, confidences[i], thickness=-1)
+            cv2.rectangle(self.semantic_id_grid, pt1, pt2, first_id + i, thickness=-1)
+        
+        self.grid[self._obstacle_u8.view(bool)] = CellType.OBSTACLE.value
+        self._compact_detections()
+    
+    def _compact_detections(self):
+        """Drop detections no longer visible in any cell so the list stays bounded by the grid size"""
+        live_ids, remapped = np.unique(self.semantic_id_grid, return_inverse=True)
+        if live_ids[0] < 0:
+            # Empty cells (-1) sort first; shift so they stay -1
+            live_ids = live_ids[1:]
+            remapped = remapped - 1
+        if len(live_ids) == len(self.detections_list):
+            return
         
-        return base_cost * confidence_factor
+        self.detections_list = [self.detections_list[i] for i in live_ids.tolist()]
+        self.semantic_id_grid[...] = remapped.reshape(self.semantic_id_grid.shape)
     
     def _inflate_obstacles(self):
         """Inflate obstacles for safety margin"""
         if self.obstacle_inflation_radius <= 0:
             return
         
-        # Create kernel for inflation
+        # Create kernel for inflation (rebuilt only when the radius changes)
         kernel_size = 2 * self.obstacle_inflation_radius + 1
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+        if self._inflation_kernel is None or self._inflation_kernel.shape[0] != kernel_size:
+            self._inflation_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
         
-        # Find obstacle cells
-        obstacle_mask = (self.grid == CellType.OBSTACLE.value).astype(np.uint8)
+        # Find obstacle cells (bool viewed as uint8 so OpenCV takes its 8U path without a copy)
+        obstacle_mask = np.equal(self.grid, CellType.OBSTACLE.value, out=self._tmp_bool1).view(np.uint8)
         
         # Dilate obstacles
-        inflated_mask = cv2.dilate(obstacle_mask, kernel, iterations=1)
+        inflated_mask = cv2.dilate(obstacle_mask, self._inflation_kernel, dst=self._inflated_u8, iterations=1)
         
         # Apply inflation (only to FREE cells, don't overwrite existing obstacles)
-        inflation_cells = (inflated_mask == 1) & (self.grid == CellType.FREE.value)
+        inflation_cells = np.equal(self.grid, CellType.FREE.value, out=self._tmp_bool2)
+        np.logical_and(inflation_cells, inflated_mask, out=inflation_cells)
         
         # Set inflated cells to high cost instead of full obstacle
         inflated_cost = 5.0 * self.safety_margin
-        self.cost_grid[inflation_cells] = np.maximum(self.cost_grid[inflation_cells], inflated_cost)
+        np.maximum(self.cost_grid, inflated_cost, out=self.cost_grid, where=inflation_cells)
+    
+    def get_obstacle_bits(self) -> np.ndarray:
+        """Packed obstacle bitmap for line_clear, repacked from the grid when the version changes"""
+        if self._obstacle_bits_version != self.version:
+            obstacle_mask = np.equal(self.grid, CellType.OBSTACLE.value, out=self._tmp_bool1)
+            packed = np.packbits(obstacle_mask, axis=1, bitorder='little')
+            self._obstacle_bytes[:, :packed.shape[1]] = packed
+            self._obstacle_bits_version = self.version
+        return self._obstacle_bits
+    
+    def is_line_clear(self, x0: int, y0: int, x1: int, y1: int) -> bool:
+        """Check line of sight between two cells against the packed obstacle bitmap"""
+        return bool(line_clear(self.get_obstacle_bits(), self.grid_width, x0, y0, x1, y1))
     
     def is_valid_position(self, grid_x: int, grid_y: int) -> bool:
         """Check if grid position is valid for navigation"""
@@ -200,27 +350,47 @@ class LibraryGridMap:
         
         return self.cost_grid[grid_y, grid_x]
     
+    def get_cost_array(self) -> np.ndarray:
+        """Get traversal cost for every cell at once (inf for obstacles, same values as get_cost)"""
+        return np.where(self.grid == CellType.OBSTACLE.value, np.float32(np.inf), self.cost_grid)
+    
     def get_neighbors(self, grid_x: int, grid_y: int, include_diagonal: bool = True) -> List[Tuple[int, int]]:
         """Get valid neighboring cells"""
-        neighbors = []
+        if NUMBA_AVAILABLE:
+            count = self.get_neighbors_into(grid_x, grid_y, self._nbr_buf, include_diagonal)
+            return [(x, y) for x, y in self._nbr_buf[:count].tolist()]
         
-        # 4-connected neighbors
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        
-        # Add diagonal neighbors if requested
-        if include_diagonal:
-            directions.extend([(1, 1), (1, -1), (-1, 1), (-1, -1)])
-        
-        for dx, dy in directions:
+        # Plain Python: walk the constant direction tuple directly
+        grid = self.grid
+        width, height = self.grid_width, self.grid_height
+        neighbors = []
+        for dx, dy in (_DIRS8 if include_diagonal else _DIRS4):
             new_x, new_y = grid_x + dx, grid_y + dy
-            if self.is_valid_position(new_x, new_y):
+            if 0 <= new_x < width and 0 <= new_y < height and grid[new_y, new_x] != _OBSTACLE:
                 neighbors.append((new_x, new_y))
-        
         return neighbors
     
+    def get_neighbors_into(self, grid_x: int, grid_y: int, out_buf: np.ndarray,
+                           include_diagonal: bool = True) -> int:
+        """
+        Write valid neighboring cells into a caller-owned buffer
+        
+        Args:
+            grid_x, grid_y: Cell to expand
+            out_buf: int32 array of shape (8, 2) receiving (x, y) rows
+            include_diagonal: Whether to include the 4 diagonal neighbors
+            
+        Returns:
+            Number of neighbors written
+        """
+        return _neighbors_nb(self.grid, grid_x, grid_y, 8 if include_diagonal else 4, out_buf)
+    
     def get_semantic_info(self, grid_x: int, grid_y: int) -> Optional[Dict]:
         """Get semantic information for grid cell"""
-        return self.semantic_cells.get((grid_x, grid_y))
+        if not (0 <= grid_x < self.grid_width and 0 <= grid_y < self.grid_height):
+            return None
+        detection_id = self.semantic_id_grid[grid_y, grid_x]
+        return None if detection_id < 0 else self.detections_list[detection_id]
     
     def set_goal(self, pixel_x: float, pixel_y: float):
         """Set goal position on the map"""
@@ -235,6 +405,7 @@ class LibraryGridMap:
         grid_x, grid_y = self.pixel_to_grid(pixel_x, pixel_y)
         # Start can be set even in occupied cells (current position)
         self.grid[grid_y, grid_x] = CellType.START.value
+        self.version += 1
         return grid_x, grid_y
     
     def clear_path(self):
@@ -251,6 +422,10 @@ class LibraryGridMap:
     
     def get_safe_radius_around_point(self, grid_x: int, grid_y: int, max_radius: int = 5) -> int:
         """Find largest safe radius around a point"""
+        if self.is_valid_position(grid_x, grid_y):
+            return int(min(max_radius, self._get_clearance()[grid_y, grid_x] - 1))
+        
+        # Blocked or off-map points are rare, scan the perimeter rings directly
         for radius in range(1, max_radius + 1):
             for dx in range(-radius, radius + 1):
                 for dy in range(-radius, radius + 1):
@@ -260,32 +435,26 @@ class LibraryGridMap:
                             return radius - 1
         return max_radius
     
+    def _get_clearance(self) -> np.ndarray:
+        """Distance transform of free space, treating obstacles and the map edge as blocked"""
+        if self._clearance_version != self.version:
+            # The padded border stays blocked so off-map cells count like obstacles
+            np.not_equal(self.grid, CellType.OBSTACLE.value, out=self._clearance_mask[1:-1, 1:-1].view(bool))
+            cv2.distanceTransform(self._clearance_mask, cv2.DIST_C, 3, dst=self._clearance_full)
+            self._clearance_version = self.version
+        return self._clearance
+    
     def get_visualization(self) -> np.ndarray:
         """Get visual representation of the grid map"""
-        # Create color map
-        vis_map = np.zeros((self.grid_height, self.grid_width, 3), dtype=np.uint8)
-        
-        # Color mapping
-        colors = {
-            CellType.FREE.value: (255, 255, 255),      # White
-            CellType.OBSTACLE.value: (0, 0, 0),        # Black
-            CellType.UNKNOWN.value: (128, 128, 128),   # Gray
-            CellType.GOAL.value: (0, 255, 0),          # Green
-            CellType.START.value: (0, 0, 255),         # Blue
-            CellType.PATH.value: (255, 0, 0)           # Red
-        }
-        
-        for cell_type, color in colors.items():
-            mask = self.grid == cell_type
-            vis_map[mask] = color
+        # Create color map in one lookup
+        vis_map = _COLOR_LUT[self.grid]
         
         # Overlay cost information (darker = higher cost)
         cost_overlay = np.clip(self.cost_grid * 50, 0, 255).astype(np.uint8)
         free_cells = self.grid == CellType.FREE.value
         
-        # Darken free cells based on cost
-        for i in range(3):
-            vis_map[free_cells, i] = np.maximum(0, vis_map[free_cells, i] - cost_overlay[free_cells])
+        # Darken free cells based on cost (white never underflows)
+        np.subtract(vis_map, cost_overlay[..., None], out=vis_map, where=free_cells[..., None])
         
         return vis_map
     
@@ -9,9 +9,12 @@ from typing import Dict, List, Tuple, Optional, Set
 from datetime import datetime
 import cv2
 from collections import defaultdict, deque
+from itertools import islice
 import os
 
 class LibraryMapBuilder:
+    MAX_RELATIONSHIPS = 1000  # Bound on stored spatial relationships
+    
     def __init__(self, confidence_threshold: float = 0.7, memory_size: int = 100):
         """
         Initialize the library semantic map builder
@@ -44,7 +47,7 @@ class LibraryMapBuilder:
         }
         
         # Spatial relationships for mapping
-        self.spatial_relationships = []
+        self.spatial_relationships = deque(maxlen=self.MAX_RELATIONSHIPS)
         self.landmark_objects = {}
         
         print("✅ Library Semantic Map Builder initialized")
@@ -167,12 +170,8 @@ class LibraryMapBuilder:
                 rel_info = self._calculate_relationship(det1, det2)
                 relationships.append(rel_info)
         
-        # Store spatial relationships
+        # Store spatial relationships (bounded deque drops the oldest)
         self.spatial_relationships.extend(relationships)
-        
-        # Keep only recent relationships (avoid memory explosion)
-        if len(self.spatial_relationships) > 1000:
-            self.spatial_relationships = self.spatial_relationships[-500:]
     
     def _calculate_relationship(self, obj1: Dict, obj2: Dict) -> Dict:
         """Calculate detailed spatial relationship between two objects"""
@@ -368,12 +367,17 @@ class LibraryMapBuilder:
         """Generate comprehensive navigation map"""
         return {
             'persistent_objects': self.persistent_objects,
-            'spatial_relationships': self.spatial_relationships[-50:],  # Recent relationships
+            'spatial_relationships': self._recent_relationships(50),
             'object_frequency': dict(self.object_frequency),
             'memory_summary': self._get_spatial_memory_summary(),
             'last_updated': datetime.now().isoformat()
         }
     
+    def _recent_relationships(self, n: int) -> List[Dict]:
+        """Return the last n relationships without copying the whole deque"""
+        start = max(0, len(self.spatial_relationships) - n)
+        return list(islice(self.spatial_relationships, start, None))
+    
     def save_map(self, filepath: str):
         """Save semantic map to file"""
         map_data = self.get_navigation_map()
@@ -400,7 +404,8 @@ class LibraryMapBuilder:
         
         # Restore data structures
         self.persistent_objects = map_data.get('persistent_objects', {})
-        self.spatial_relationships = map_data.get('spatial_relationships', [])
+        self.spatial_relationships = deque(map_data.get('spatial_relationships', []),
+                                           maxlen=self.MAX_RELATIONSHIPS)
         self.object_frequency = defaultdict(int, map_data.get('object_frequency', {}))
         
         print(f"✅ Semantic map loaded from {filepath}")
@@ -0,0 +1,400 @@
+"""
+Test Suite for the LLM Integration Layer
+Tests detection conversion and rule-based navigation reasoning without a trained model
+"""
+
+import os
+
+# Must be set before Ultralytics is first imported
+os.environ.setdefault("YOLO_VERBOSE", "False")
+
+import contextlib
+import io
+import json
+import threading
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from typing import List
+
+from src.llm_integration.llm_reasoning_engine import LLMNavigationReasoner
+from src.llm_integration.navigation_pipeline import BasicNavigationPipeline
+
+class _Tensor:
+    """Host-side stand-in for the torch tensors on a YOLO result (only .cpu().numpy() is used)"""
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+    
+    def cpu(self):
+        return self
+    
+    def numpy(self):
+        return self.values
+
+class _Boxes:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy, self.conf, self.cls = _Tensor(xyxy), _Tensor(conf), _Tensor(cls)
+    
+    def __len__(self):
+        return len(self.conf.values)
+
+class _Result:
+    def __init__(self, xyxy, conf, cls):
+        self.boxes = _Boxes(np.reshape(xyxy, (-1, 4)), conf, cls)
+
+def create_rule_based_pipeline() -> BasicNavigationPipeline:
+    """Pipeline with rule-based reasoning only, built without loading YOLO weights"""
+    pipeline = BasicNavigationPipeline.__new__(BasicNavigationPipeline)
+    pipeline.class_names = {
+        1: "books", 2: "monitor", 3: "office-chair",
+        4: "whiteboard", 5: "table", 6: "tv"
+    }
+    pipeline.use_llm = False
+    pipeline.llm_reasoner = None
+    pipeline.max_staleness_s = 5.0
+    pipeline._last_sig = None
+    pipeline._last_decision = None
+    pipeline._last_decision_at = 0.0
+    return pipeline
+
+def analyze_boxes(pipeline: BasicNavigationPipeline, xyxy: List[List[float]], conf: List[float],
+                  cls: List[int], image_shape=(480, 640, 3)) -> dict:
+    """Run the post-detection half of process_frame on hand-made boxes"""
+    return pipeline._analyze_result(_Result(xyxy, conf, cls), image_shape, "Navigate safely", "Library")
+
+def test_bottom_center_obstacle():
+    """Test that an object low in the middle of the frame is reported as an obstacle"""
+    print("\n🚀 Testing Bottom-Centre Obstacle Warning")
+    print("=" * 50)
+    
+    pipeline = create_rule_based_pipeline()
+    
+    # Table centred at (320, 430) in a 640x480 frame: the 'bottom' cell, directly in the walking path
+    result = analyze_boxes(pipeline, [[260, 390, 380, 470]], [0.6], [5])
+    detection = result['detections'][0]
+    assert detection['frame_position'] == 'bottom'
+    
+    # Array path (process_frame) and dict-only path must agree
+    for decision in (result['navigation_decision'],
+                     pipeline._basic_navigation_reasoning(result['detections'], result['spatial_context'])):
+        assert decision['obstacles'] == 'table'
+        assert decision['direction'].startswith("Obstacles ahead: table")
+        assert decision['safety_level'] == "Medium"
+    print(f"✅ Bottom-centre table: {result['navigation_decision']['direction']}")
+    
+    # The same table in a bottom corner is not in the path
+    result = analyze_boxes(pipeline, [[20, 390, 140, 470]], [0.6], [5])
+    assert result['detections'][0]['frame_position'] == 'bottom-left'
+    assert result['navigation_decision']['obstacles'] == "None"
+    assert result['navigation_decision']['safety_level'] == "Low"
+    print(f"✅ Bottom-left table: {result['navigation_decision']['direction']}")
+    
+    return True
+
+def create_offline_reasoner() -> LLMNavigationReasoner:
+    """Reasoner for a local backend; nothing is listening, so only the offline paths run"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return LLMNavigationReasoner(model_type="local")
+
+def scene_detection(class_name: str, frame_position: str, confidence: float) -> dict:
+    """Minimal detection dict as consumed by the reasoner"""
+    return {'class_name': class_name, 'frame_position': frame_position, 'confidence': confidence}
+
+class _StreamResponse:
+    """
+    Streaming HTTP response replaying Ollama NDJSON chunks, counting how many were read;
+    reading pauses after hold_after chunks until resume is set
+    """
+    def __init__(self, chunks, hold_after=None):
+        self.chunks = chunks
+        self.read = 0
+        self.closed = False
+        self.hold_after = hold_after
+        self.resume = threading.Event()
+    
+    def iter_lines(self):
+        for chunk in self.chunks:
+            if self.read == self.hold_after:
+                self.resume.wait(2.0)
+            self.read += 1
+            yield json.dumps(chunk).encode('utf-8')
+    
+    def close(self):
+        self.closed = True
+    
+    def wait_closed(self, timeout=2.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.closed
+
+def test_openai_without_key_stays_offline():
+    """Test that an OpenAI reasoner without an API key never contacts the API"""
+    print("\n🚀 Testing Keyless OpenAI Reasoner")
+    print("=" * 50)
+    
+    saved_key = os.environ.pop('OPENAI_API_KEY', None)
+    warmups = []
+    saved_warmup = LLMNavigationReasoner._warmup
+    LLMNavigationReasoner._warmup = lambda self: warmups.append(self.model_type)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            reasoner = LLMNavigationReasoner()
+            reasoner._last_call_at -= 2 * reasoner.IDLE_REWARM_SEC  # Idle long enough to re-warm
+            scene = analyze_boxes(create_rule_based_pipeline(), [[260, 200, 380, 300]], [0.9], [5])
+            decision = reasoner.reason_about_navigation(scene['detections'], scene['spatial_context'])
+    finally:
+        LLMNavigationReasoner._warmup = saved_warmup
+        if saved_key is not None:
+            os.environ['OPENAI_API_KEY'] = saved_key
+    
+    # No warmup thread (at construction or idle re-warm) and no "Bearer None" header
+    assert not warmups
+    assert 'Authorization' not in reasoner._session.headers
+    assert decision['direction']
+    print(f"✅ Rule-based fallback without network: {decision['direction']}")
+    
+    return True
+
+def test_llm_response_parsing():
+    """Test the regex parser for KEY: value replies and the JSON-mode parser"""
+    print("\n🚀 Testing LLM Response Parsing")
+    print("=" * 50)
+    
+    reasoner = create_offline_reasoner()
+    
+    # Markdown bullets/bold and spaced or singular key names are tolerated
+    result = reasoner._parse_llm_response(
+        "Sure, here is the guidance:\n"
+        "- **DIRECTION:** Turn left past the table\n"
+        "**Safety Level**: High\n"
+        "OBSTACLE: office-chair\n"
+        "  landmarks: monitor ahead\n"
+        "NEXT_ACTION: Stop at the desk"
+    )
+    assert result['direction'] == "Turn left past the table"
+    assert result['safety_level'] == "High"
+    assert result['obstacles'] == "office-chair"
+    assert result['landmarks'] == "monitor ahead"
+    assert result['next_action'] == "Stop at the desk"
+    assert result['reasoning'] == "Default navigation guidance"  # Missing fields keep their defaults
+    
+    # Blank lines before the block are skipped; anything after the block's blank line is ignored
+    result = reasoner._parse_llm_response(
+        "\n\nDIRECTION: Wait here\nSAFETY_LEVEL: Low\n\nDIRECTION: Ignored second block"
+    )
+    assert result['direction'] == "Wait here"
+    assert result['safety_level'] == "Low"
+    print("✅ KEY: value reply parsed")
+    
+    # JSON mode: list values are joined, unknown keys ignored
+    result = reasoner._parse_llm_response(
+        '  {"direction": "Go straight", "obstacles": ["books", "table"], "safety_level": "Low", "extra": 1}'
+    )
+    assert result['direction'] == "Go straight"
+    assert result['obstacles'] == "books, table"
+    assert result['safety_level'] == "Low"
+    assert 'extra' not in result
+    
+    # Truncated JSON falls back to the defaults instead of raising
+    result = reasoner._parse_llm_response('{"direction": "Go')
+    assert result['direction'] == "Continue forward with caution"
+    assert result['safety_level'] == "Medium"
+    print("✅ JSON reply parsed")
+    
+    assert len(reasoner.conversation_history) == 4
+    assert reasoner.conversation_history[0]['safety_level'] == "High"
+    
+    return True
+
+def test_scene_cache():
+    """Test that unchanged scenes reuse the LLM decision from the LRU scene cache"""
+    print("\n🚀 Testing Scene Decision Cache")
+    print("=" * 50)
+    
+    reasoner = create_offline_reasoner()
+    spatial_context = {'relationships': [], 'scene_density': 'sparse', 'object_count': 1}
+    
+    def scene_key(i, confidence=0.8):
+        return reasoner._scene_key([scene_detection("table", "center", confidence)], spatial_context,
+                                   f"Navigate to desk {i}", "Library")
+    
+    def decision(i, safety_level="Low"):
+        return {'direction': f"Decision {i}", 'reasoning': "", 'obstacles': "None", 'landmarks': "None",
+                'safety_level': safety_level, 'next_action': "", 'environment_type': ""}
+    
+    # Confidence jitter within the rounding step maps to the same scene
+    assert scene_key(0, 0.81) == scene_key(0, 0.79)
+    assert scene_key(0) != scene_key(1)
+    
+    # A hit is served without a request, as a copy the caller can't use to corrupt the cache
+    reasoner._cache_scene_result(scene_key(0), decision(0))
+    hit = reasoner.reason_about_navigation([scene_detection("table", "center", 0.8)], spatial_context,
+                                           "Navigate to desk 0", "Library")
+    assert hit == decision(0)
+    hit['direction'] = "changed"
+    assert reasoner._scene_cache[scene_key(0)]['direction'] == "Decision 0"
+    
+    # Least recently used scenes are evicted first; the hit above refreshed scene 0
+    for i in range(1, reasoner.SCENE_CACHE_SIZE + 1):
+        reasoner._cache_scene_result(scene_key(i), decision(i))
+        if i == 1:
+            reasoner.reason_about_navigation([scene_detection("table", "center", 0.8)], spatial_context,
+                                             "Navigate to desk 0", "Library")
+    assert len(reasoner._scene_cache) == reasoner.SCENE_CACHE_SIZE
+    assert scene_key(0) in reasoner._scene_cache
+    assert scene_key(1) not in reasoner._scene_cache
+    print(f"✅ LRU cache bounded at {reasoner.SCENE_CACHE_SIZE} scenes")
+    
+    # High-risk decisions are never replayed, and replace any cached entry for the scene
+    reasoner._cache_scene_result(scene_key(0), decision(0, safety_level="High - chair in path"))
+    assert scene_key(0) not in reasoner._scene_cache
+    print("✅ High-risk decisions not cached")
+    
+    return True
+
+def test_ollama_stream_early_stop():
+    """Test that the Ollama stream reader returns once the last field is complete and drains the rest"""
+    print("\n🚀 Testing Ollama Stream Early Stop")
+    print("=" * 50)
+    
+    read_stream = LLMNavigationReasoner._read_ollama_stream
+    
+    # Field names split across tokens; the ENVIRONMENT_TYPE line ends in the fourth chunk
+    response = _StreamResponse([
+        {'response': "DIRECTION: Turn left\nREAS"},
+        {'response': "ONING: Chair ahead\nENVIRONMENT_"},
+        {'response': "TYPE: study area"},
+        {'response': "\nThis trailing text"},
+        {'response': " should never be read"},
+        {'response': "", 'done': True}
+    ], hold_after=4)
+    text = read_stream(response)
+    assert response.read == 4 and not response.closed
+    assert "never" not in text
+    
+    # The remainder is read off the caller's thread so the pooled connection can be reused
+    response.resume.set()
+    assert response.wait_closed()
+    assert response.read == len(response.chunks)
+    
+    reasoner = create_offline_reasoner()
+    result = reasoner._parse_llm_response(text)
+    assert result['direction'] == "Turn left"
+    assert result['environment_type'] == "study area"
+    print("✅ Returned after 4 chunks, rest drained in the background")
+    
+    # A reply that never reaches ENVIRONMENT_TYPE is read until done, skipping keep-alive blank lines
+    response = _StreamResponse([
+        {'response': "DIRECTION: Stop\n"},
+        {'response': "SAFETY_LEVEL: High"},
+        {'response': "", 'done': True},
+        {'response': "ignored"}
+    ])
+    text = read_stream(response)
+    assert response.read == 3 and response.closed
+    assert text == "DIRECTION: Stop\nSAFETY_LEVEL: High"
+    print("✅ Incomplete reply read until done")
+    
+    # Leading blank lines and a preamble don't end the reply; the first blank line after a field does
+    response = _StreamResponse([
+        {'response': "\n\nHere is my guidance:\n\nDIREC"},
+        {'response': "TION: Turn right\nSAFETY_LEVEL: Low\n"},
+        {'response': "\nDIRECTION: Second block"},
+        {'response': " should never be read"},
+        {'response': "", 'done': True}
+    ], hold_after=3)
+    text = read_stream(response)
+    assert response.read == 3
+    response.resume.set()
+    assert response.wait_closed()
+    result = reasoner._parse_llm_response(text)
+    assert result['direction'] == "Turn right"
+    assert result['safety_level'] == "Low"
+    print("✅ Block ends at the first blank line after a field")
+    
+    return True
+
+def test_scene_signature():
+    """Test that the LLM gate's scene signature keeps each class paired with its position"""
+    print("\n🚀 Testing Scene Signature")
+    print("=" * 50)
+    
+    pipeline = create_rule_based_pipeline()
+    chair_left_table_right = analyze_boxes(pipeline, [[40, 200, 140, 300], [480, 200, 600, 300]], [0.8, 0.8], [3, 5])
+    table_left_chair_right = analyze_boxes(pipeline, [[40, 200, 140, 300], [480, 200, 600, 300]], [0.8, 0.8], [5, 3])
+    reordered = analyze_boxes(pipeline, [[480, 200, 600, 300], [40, 200, 140, 300]], [0.8, 0.8], [5, 3])
+    
+    def signature(result):
+        return pipeline._scene_signature(result['arrays'], result['spatial_context'])
+    
+    # Swapping which object is where is a different scene; detection order is not
+    assert signature(chair_left_table_right) != signature(table_left_chair_right)
+    assert signature(chair_left_table_right) == signature(reordered)
+    hash(signature(reordered))
+    print("✅ Swapped objects change the signature, reordering does not")
+    
+    return True
+
+def test_result_timestamp():
+    """Test that results carry only the monotonic timestamp, converted to a datetime on demand"""
+    print("\n🚀 Testing Result Timestamps")
+    print("=" * 50)
+    
+    pipeline = create_rule_based_pipeline()
+    before = datetime.now()
+    result = analyze_boxes(pipeline, [], [], [])
+    after = datetime.now()
+    
+    assert 'timestamp' not in result  # No per-frame datetime on the hot path
+    assert isinstance(result['timestamp_ns'], int)
+    wall_time = BasicNavigationPipeline.result_datetime(result)
+    assert before - timedelta(seconds=1) <= wall_time <= after + timedelta(seconds=1)
+    print(f"✅ Result timestamp: {wall_time}")
+    
+    return True
+
+def main():
+    """Run all LLM integration tests"""
+    print("🧪 LLM INTEGRATION TEST SUITE")
+    print("=" * 60)
+    
+    test_results = []
+    
+    try:
+        test_results.append(("Bottom-Centre Obstacle", test_bottom_center_obstacle()))
+        test_results.append(("Scene Signature", test_scene_signature()))
+        test_results.append(("Result Timestamp", test_result_timestamp()))
+        test_results.append(("Keyless OpenAI Offline", test_openai_without_key_stays_offline()))
+        test_results.append(("LLM Response Parsing", test_llm_response_parsing()))
+        test_results.append(("Scene Cache", test_scene_cache()))
+        test_results.append(("Ollama Early Stop", test_ollama_stream_early_stop()))
+    
+    except Exception as e:
+        print(f"\n❌ Test suite failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print("TEST RESULTS SUMMARY")
+    print("=" * 60)
+    
+    passed_tests = 0
+    total_tests = len(test_results)
+    
+    for test_name, result in test_results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"   {test_name:<25} {status}")
+        if result:
+            passed_tests += 1
+    
+    print(f"\n📊 Final Score: {passed_tests}/{total_tests} tests passed")
+    
+    return passed_tests == total_tests
+
+if __name__ == "__main__":
+    success = main()
+    if not success:
+        exit(1)
@@ -3,13 +3,20 @@ Comprehensive Test Suite for Pathfinding Algorithms
 Tests A*, D*, RRT*, and integrated navigation planner
 """
 
+import heapq
+import io
+import math
 import time
+import contextlib
 import cv2
 import numpy as np
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 # Import pathfinding components
-from src.pathfinding.grid_map import LibraryGridMap
+import src.pathfinding.astar as astar_module
+import src.pathfinding.dstar as dstar_module
+import src.pathfinding.grid_map as grid_map_module
+from src.pathfinding.grid_map import LibraryGridMap, CellType, line_clear
 from src.pathfinding.astar import AStarPathfinder
 from src.pathfinding.dstar import DStarPathfinder
 from src.pathfinding.rrt_star import RRTStarPathfinder
@@ -149,6 +156,490 @@ def test_dstar_pathfinding():
     
     return True
 
+def dijkstra_costs_to_goal(grid_map: LibraryGridMap, goal: Tuple[int, int]) -> Dict[Tuple[int, int], float]:
+    """Reference cost-to-goal for every reachable cell (a move costs step length times the departed cell's cost)"""
+    dist = {goal: 0.0}
+    queue = [(0.0, goal)]
+    while queue:
+        d, (x, y) = heapq.heappop(queue)
+        if d > dist[(x, y)]:
+            continue
+        for nx, ny in grid_map.get_neighbors(x, y, True):
+            step = math.sqrt(2) if nx != x and ny != y else 1.0
+            nd = d + step * float(grid_map.get_cost(nx, ny))
+            if nd < dist.get((nx, ny), float('inf')):
+                dist[(nx, ny)] = nd
+                heapq.heappush(queue, (nd, (nx, ny)))
+    return dist
+
+def test_dstar_replan_matches_dijkstra():
+    """Test D* Lite initial plans and replans against Dijkstra, compiled and pure Python"""
+    print("\n🚀 Testing D* Replanning Optimality")
+    print("=" * 50)
+    
+    numba_modes = [True, False] if dstar_module.NUMBA_AVAILABLE else [False]
+    for use_numba in numba_modes:
+        saved = dstar_module.NUMBA_AVAILABLE
+        dstar_module.NUMBA_AVAILABLE = use_numba
+        # Seed 1 includes maps where a vertex's key ties the start's up to rounding,
+        # which used to end the search before the replan was optimal
+        rng = np.random.default_rng(1)
+        checked = 0
+        try:
+            for _ in range(40):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    grid_map = LibraryGridMap(800, 600, 20.0)
+                    shape = grid_map.grid.shape
+                    grid_map.grid[rng.random(shape) < 0.15] = CellType.OBSTACLE.value
+                    grid_map.cost_grid[:] = 1 + rng.integers(0, 3, shape)
+                    goal = (int(rng.integers(0, 40)), int(rng.integers(0, 30)))
+                    start = (int(rng.integers(0, 40)), int(rng.integers(0, 30)))
+                    grid_map.grid[goal[1], goal[0]] = CellType.FREE.value
+                    grid_map.grid[start[1], start[0]] = CellType.FREE.value
+                    
+                    pathfinder = DStarPathfinder(grid_map)
+                    pathfinder.set_goal(*goal)
+                    path = pathfinder.find_path(*start)
+                
+                reference = dijkstra_costs_to_goal(grid_map, goal).get(start)
+                assert (path is None) == (reference is None)
+                if path is None:
+                    continue
+                assert abs(pathfinder.get_search_statistics()['path_cost'] - reference) < 1e-6
+                
+                # New obstacles and cost increases, then replan from the same start
+                with contextlib.redirect_stdout(io.StringIO()):
+                    grid_map.grid[rng.random(shape) < 0.05] = CellType.OBSTACLE.value
+                    grid_map.cost_grid[rng.random(shape) < 0.05] = 4
+                    grid_map.grid[goal[1], goal[0]] = CellType.FREE.value
+                    grid_map.grid[start[1], start[0]] = CellType.FREE.value
+                    grid_map.version += 1
+                    new_path = pathfinder.replan_if_needed(*start)
+                
+                reference = dijkstra_costs_to_goal(grid_map, goal).get(start)
+                assert (new_path is None) == (reference is None)
+                if new_path is not None:
+                    assert new_path[0] == start and new_path[-1] == goal
+                    assert abs(pathfinder.get_search_statistics()['path_cost'] - reference) < 1e-6
+                checked += 1
+        finally:
+            dstar_module.NUMBA_AVAILABLE = saved
+        
+        print(f"✅ {'Compiled' if use_numba else 'Python'} D*: {checked} replans match Dijkstra")
+    
+    return True
+
+def create_random_grid(rng: np.random.Generator, width: int = 800, height: int = 600,
+                       obstacle_fraction: float = 0.2) -> LibraryGridMap:
+    """Random obstacles and traversal costs of 1-3 on a 20 px grid"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        grid_map = LibraryGridMap(width, height, 20.0)
+    shape = grid_map.grid.shape
+    grid_map.grid[rng.random(shape) < obstacle_fraction] = CellType.OBSTACLE.value
+    grid_map.cost_grid[:] = 1 + rng.integers(0, 3, shape)
+    grid_map.version += 1
+    return grid_map
+
+def random_free_cell(rng: np.random.Generator, grid_map: LibraryGridMap) -> Tuple[int, int]:
+    """Uniformly chosen non-obstacle cell"""
+    free_y, free_x = np.nonzero(grid_map.grid != CellType.OBSTACLE.value)
+    k = int(rng.integers(len(free_x)))
+    return int(free_x[k]), int(free_y[k])
+
+def reference_line_of_sight(grid_map: LibraryGridMap, start: Tuple[int, int], end: Tuple[int, int]) -> bool:
+    """Cell-by-cell 4-connected Bresenham walk (the original A* line-of-sight check)"""
+    x0, y0 = start
+    x1, y1 = end
+    dx, dy = abs(x1 - x0), abs(y1 - y0)
+    x_inc = 1 if x1 > x0 else -1
+    y_inc = 1 if y1 > y0 else -1
+    error = dx - dy
+    x, y = x0, y0
+    while True:
+        if not grid_map.is_valid_position(x, y):
+            return False
+        if x == x1 and y == y1:
+            return True
+        if error > 0:
+            x += x_inc
+            error -= dy
+        else:
+            y += y_inc
+            error += dx
+
+def test_astar_matches_dijkstra():
+    """Test compiled and pure Python A* against Dijkstra, and both smoothing passes against Bresenham"""
+    print("\n🚀 Testing A* Optimality and Path Smoothing")
+    print("=" * 50)
+    
+    numba_modes = [True, False] if astar_module.NUMBA_AVAILABLE else [False]
+    saved = astar_module.NUMBA_AVAILABLE
+    rng = np.random.default_rng(2)
+    checked = 0
+    try:
+        for _ in range(20):
+            grid_map = create_random_grid(rng)
+            start, goal = random_free_cell(rng, grid_map), random_free_cell(rng, grid_map)
+            # A move costs the step length times the entered cell's cost, which is what
+            # a search from the start charges walking the path backwards
+            reference = dijkstra_costs_to_goal(grid_map, start).get(goal)
+            
+            smoothed = []
+            for use_numba in numba_modes:
+                astar_module.NUMBA_AVAILABLE = use_numba
+                with contextlib.redirect_stdout(io.StringIO()):
+                    pathfinder = AStarPathfinder(grid_map)
+                    path = pathfinder.find_path(*start, *goal, smooth_path=False)
+                
+                assert (path is None) == (reference is None)
+                if path is None:
+                    continue
+                assert path[0] == start and path[-1] == goal
+                walked = 0.0
+                for (ax, ay), (bx, by) in zip(path, path[1:]):
+                    assert max(abs(bx - ax), abs(by - ay)) == 1
+                    walked += (math.sqrt(2) if ax != bx and ay != by else 1.0) * float(grid_map.get_cost(bx, by))
+                assert abs(walked - reference) < 1e-6
+                assert abs(pathfinder.get_search_statistics()['path_cost'] - reference) < 1e-6
+                
+                # Both smoothing passes on the same raw path must keep the same waypoints
+                smoothed = [pathfinder._smooth_path(path)]
+                if use_numba:
+                    astar_module.NUMBA_AVAILABLE = False
+                    smoothed.append(pathfinder._smooth_path(path))
+                    assert smoothed[0] == smoothed[1]
+                
+                # Shortcuts only along clear lines; an unshortened diagonal step may cut a corner
+                waypoints = smoothed[0]
+                assert waypoints[0] == start and waypoints[-1] == goal
+                for a, b in zip(waypoints, waypoints[1:]):
+                    assert reference_line_of_sight(grid_map, a, b) or max(abs(b[0] - a[0]), abs(b[1] - a[1])) == 1
+            checked += 1
+    finally:
+        astar_module.NUMBA_AVAILABLE = saved
+    
+    modes = " and ".join("compiled" if m else "Python" for m in numba_modes)
+    print(f"✅ {checked} searches match Dijkstra ({modes})")
+    return True
+
+def test_astar_options_in_both_modes():
+    """Test that diagonal_cost and timeout behave the same in the compiled and pure Python searches"""
+    print("\n🚀 Testing A* Options")
+    print("=" * 50)
+    
+    numba_modes = [True, False] if astar_module.NUMBA_AVAILABLE else [False]
+    saved = astar_module.NUMBA_AVAILABLE
+    rng = np.random.default_rng(8)
+    try:
+        for _ in range(5):
+            grid_map = create_random_grid(rng)
+            start, goal = random_free_cell(rng, grid_map), random_free_cell(rng, grid_map)
+            
+            costs = []
+            for use_numba in numba_modes:
+                astar_module.NUMBA_AVAILABLE = use_numba
+                with contextlib.redirect_stdout(io.StringIO()):
+                    pathfinder = AStarPathfinder(grid_map)
+                    pathfinder.diagonal_cost = 1.9
+                    path = pathfinder.find_path(*start, *goal, smooth_path=False)
+                
+                # Path cost re-derived with the configured diagonal step
+                if path is not None:
+                    walked = sum((1.9 if ax != bx and ay != by else 1.0) * float(grid_map.get_cost(bx, by))
+                                 for (ax, ay), (bx, by) in zip(path, path[1:]))
+                    assert abs(pathfinder.get_search_statistics()['path_cost'] - walked) < 1e-6
+                costs.append(pathfinder.get_search_statistics()['path_cost'])
+                
+                # An exhausted time budget is reported as a timeout, not as an unreachable goal
+                with contextlib.redirect_stdout(io.StringIO()):
+                    assert pathfinder.find_path(*start, *goal, timeout=0.0) is None or start == goal
+                if start != goal:
+                    assert pathfinder.get_search_statistics()['timeout']
+            assert all(abs(c - costs[0]) < 1e-6 or c == costs[0] for c in costs)
+    finally:
+        astar_module.NUMBA_AVAILABLE = saved
+    
+    print(f"✅ diagonal_cost and timeout honoured ({len(numba_modes)} mode(s))")
+    return True
+
+def test_line_of_sight_matches_bresenham():
+    """Test the packed-bitmap line-of-sight check against a cell-by-cell Bresenham walk"""
+    print("\n🚀 Testing Line-of-Sight Bitmap")
+    print("=" * 50)
+    
+    line_clear_py = getattr(line_clear, 'py_func', line_clear)
+    rng = np.random.default_rng(3)
+    checked = 0
+    
+    # 30, 64 and 100 cells wide: within one word, exactly one word, across a word boundary
+    for width in (600, 1280, 2000):
+        grid_map = create_random_grid(rng, width, 400, obstacle_fraction=0.03)
+        bits = grid_map.get_obstacle_bits()
+        grid_width, grid_height = grid_map.grid_width, grid_map.grid_height
+        for _ in range(1000):
+            # A few endpoints fall just off the map
+            start = (int(rng.integers(-2, grid_width + 2)), int(rng.integers(-2, grid_height + 2)))
+            end = (int(rng.integers(-2, grid_width + 2)), int(rng.integers(-2, grid_height + 2)))
+            expected = reference_line_of_sight(grid_map, start, end)
+            assert grid_map.is_line_clear(*start, *end) == expected
+            assert bool(line_clear_py(bits, grid_width, *start, *end)) == expected
+            checked += 1
+    
+    # Single obstacles at the ends of the 64-cell words; the bitmap is repacked once
+    # the map version moves on
+    grid_map.grid[:] = CellType.FREE.value
+    grid_map.version += 1
+    assert grid_map.is_line_clear(0, 10, 99, 10)
+    for column in (0, 1, 62, 63, 64, 65, 98, 99):
+        grid_map.grid[10, column] = CellType.OBSTACLE.value
+        grid_map.version += 1
+        bits = grid_map.get_obstacle_bits()
+        for x0 in range(0, 100, 3):
+            for x1 in range(0, 100, 5):
+                for y1 in (10, 12):
+                    expected = reference_line_of_sight(grid_map, (x0, 10), (x1, y1))
+                    assert grid_map.is_line_clear(x0, 10, x1, y1) == expected
+                    assert bool(line_clear_py(bits, 100, x0, 10, x1, y1)) == expected
+                    checked += 1
+        grid_map.grid[10, column] = CellType.FREE.value
+    
+    print(f"✅ {checked} lines match the reference walk")
+    return True
+
+def test_dstar_heap_order():
+    """Test that the compiled 4-ary open list pops in the same order as heapq"""
+    print("\n🚀 Testing D* 4-ary Heap")
+    print("=" * 50)
+    
+    if not dstar_module.NUMBA_AVAILABLE:
+        print("ℹ️ Numba not installed, D* uses heapq directly")
+        return True
+    
+    rng = np.random.default_rng(4)
+    n = 3000
+    # Few distinct keys so k1 and k2 ties fall through to the index
+    keys1 = rng.integers(0, 20, n).astype(np.float64)
+    keys2 = rng.integers(0, 5, n).astype(np.float64)
+    indices = rng.permutation(n)
+    
+    heap_k1, heap_k2 = np.empty(n, dtype=np.float64), np.empty(n, dtype=np.float64)
+    heap_idx = np.empty(n, dtype=np.int64)
+    size = 0
+    reference = []
+    
+    def pop():
+        entry = (float(heap_k1[0]), float(heap_k2[0]), int(heap_idx[0]))
+        assert entry == heapq.heappop(reference)
+        return dstar_module._heap_pop(heap_k1, heap_k2, heap_idx, size)
+    
+    # Interleave pushes and pops the way a search does
+    for k1, k2, idx in zip(keys1.tolist(), keys2.tolist(), indices.tolist()):
+        size = dstar_module._heap_push(heap_k1, heap_k2, heap_idx, size, k1, k2, idx)
+        heapq.heappush(reference, (k1, k2, idx))
+        if idx % 3 == 0:
+            size = pop()
+    while size:
+        size = pop()
+    assert not reference
+    
+    print(f"✅ {n} entries popped in heapq order")
+    return True
+
+def test_dstar_large_change_wavefront():
+    """Test the whole-grid wavefront used after large map changes against Dijkstra"""
+    print("\n🚀 Testing D* Large-Change Replanning")
+    print("=" * 50)
+    
+    numba_modes = [True, False] if dstar_module.NUMBA_AVAILABLE else [False]
+    saved = dstar_module.NUMBA_AVAILABLE
+    for use_numba in numba_modes:
+        dstar_module.NUMBA_AVAILABLE = use_numba
+        rng = np.random.default_rng(5)
+        checked = 0
+        try:
+            for _ in range(10):
+                grid_map = create_random_grid(rng, obstacle_fraction=0.15)
+                start, goal = random_free_cell(rng, grid_map), random_free_cell(rng, grid_map)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    pathfinder = DStarPathfinder(grid_map)
+                    pathfinder.set_goal(*goal)
+                    pathfinder.find_path(*start)
+                
+                # Re-roll a quarter of the costs, well past the full-replan threshold
+                shape = grid_map.grid.shape
+                changed = rng.random(shape) < 0.25
+                grid_map.cost_grid[changed] = 1 + rng.integers(0, 4, int(changed.sum()))
+                grid_map.grid[rng.random(shape) < 0.03] = CellType.OBSTACLE.value
+                grid_map.grid[goal[1], goal[0]] = CellType.FREE.value
+                grid_map.grid[start[1], start[0]] = CellType.FREE.value
+                grid_map.version += 1
+                with contextlib.redirect_stdout(io.StringIO()):
+                    new_path = pathfinder.replan_if_needed(*start)
+                assert len(pathfinder.cost_changes) > dstar_module._FULL_REPLAN_FRACTION * grid_map.grid.size
+                
+                # Every vertex ends up consistent, not just the ones along the path
+                reference = dijkstra_costs_to_goal(grid_map, goal)
+                g = pathfinder.g.reshape(shape)
+                assert np.isfinite(g).sum() == len(reference)
+                for (x, y), cost in reference.items():
+                    assert abs(g[y, x] - cost) < 1e-6
+                
+                assert (new_path is None) == (start not in reference)
+                if new_path is not None:
+                    assert new_path[0] == start and new_path[-1] == goal
+                    assert abs(pathfinder.get_search_statistics()['path_cost'] - reference[start]) < 1e-6
+                checked += 1
+        finally:
+            dstar_module.NUMBA_AVAILABLE = saved
+        
+        print(f"✅ {'Compiled' if use_numba else 'Python'} D*: {checked} full recomputes match Dijkstra")
+    
+    return True
+
+def rasterize_reference(grid_map: LibraryGridMap, batches: List[Tuple[List[dict], bool]]):
+    """
+    One-detection-at-a-time rasterisation (the original per-cell loop) followed by
+    obstacle inflation after each batch, as update_from_detections(batch, clear) would
+    """
+    base_costs = {'office-chair': 10.0, 'table': 15.0, 'books': 8.0, 'whiteboard': 20.0, 'monitor': 3.0, 'tv': 4.0}
+    obstacle_classes = {'office-chair', 'table', 'books', 'whiteboard'}
+    shape = grid_map.grid.shape
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * grid_map.obstacle_inflation_radius + 1,) * 2)
+    offsets = [(dx - grid_map.obstacle_inflation_radius, dy - grid_map.obstacle_inflation_radius)
+               for dy, dx in zip(*np.nonzero(kernel))]
+    
+    grid = np.zeros(shape, dtype=np.int8)
+    cost_grid = np.ones(shape, dtype=np.float32)
+    confidence_grid = np.ones(shape, dtype=np.float32)
+    semantic = {}
+    for detections, clear_previous in batches:
+        if clear_previous:
+            grid.fill(CellType.FREE.value)
+            cost_grid.fill(1.0)
+            confidence_grid.fill(1.0)
+            semantic = {}
+        
+        for d in detections:
+            bbox = d['bbox']
+            x1, y1 = grid_map.pixel_to_grid(bbox['x1'], bbox['y1'])
+            x2, y2 = grid_map.pixel_to_grid(bbox['x2'], bbox['y2'])
+            cost = base_costs.get(d['class_name'], 5.0) * (0.5 + d['confidence'] * 1.5)
+            for y in range(min(y1, y2), max(y1, y2) + 1):
+                for x in range(min(x1, x2), max(x1, x2) + 1):
+                    if d['class_name'] in obstacle_classes:
+                        grid[y, x] = CellType.OBSTACLE.value
+                        cost_grid[y, x] = cost
+                    else:
+                        cost_grid[y, x] = max(cost_grid[y, x], cost * 0.5)
+                    confidence_grid[y, x] = d['confidence']
+                    semantic[(x, y)] = d
+        
+        inflated = np.zeros(shape, dtype=bool)
+        for y, x in zip(*np.nonzero(grid == CellType.OBSTACLE.value)):
+            for dx, dy in offsets:
+                if 0 <= x + dx < shape[1] and 0 <= y + dy < shape[0]:
+                    inflated[y + dy, x + dx] = True
+        inflated &= grid == CellType.FREE.value
+        cost_grid[inflated] = np.maximum(cost_grid[inflated], 5.0 * grid_map.safety_margin)
+    
+    return grid, cost_grid, confidence_grid, semantic
+
+def test_grid_rasterization_matches_reference():
+    """Test batched OpenCV rasterisation, semantic lookup and detection compaction against a per-cell reference"""
+    print("\n🚀 Testing Grid Map Rasterisation")
+    print("=" * 50)
+    
+    rng = np.random.default_rng(6)
+    class_names = ['office-chair', 'table', 'books', 'whiteboard', 'monitor', 'tv', 'unknown']
+    
+    def random_detections(count):
+        detections = []
+        for _ in range(count):
+            # Corners may be swapped or off-image; both get ordered and clamped
+            x1, x2 = rng.uniform(-60, 700, 2).tolist()
+            y1, y2 = rng.uniform(-60, 540, 2).tolist()
+            detections.append({
+                'class_name': class_names[int(rng.integers(len(class_names)))],
+                'confidence': float(rng.uniform(0.3, 1.0)),
+                'bbox': {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
+                         'center_x': (x1 + x2) / 2, 'center_y': (y1 + y2) / 2}
+            })
+        return detections
+    
+    checked = 0
+    for _ in range(5):
+        with contextlib.redirect_stdout(io.StringIO()):
+            grid_map = LibraryGridMap(width=640, height=480, resolution=20.0)
+        batches = [(random_detections(6), False), (random_detections(6), False),
+                   (random_detections(4), True), (random_detections(5), False)]
+        for b in range(1, len(batches) + 1):
+            grid_map.update_from_detections(*batches[b - 1])
+            grid, cost_grid, confidence_grid, semantic = rasterize_reference(grid_map, batches[:b])
+            assert np.array_equal(grid_map.grid, grid)
+            assert np.array_equal(grid_map.cost_grid, cost_grid)
+            assert np.array_equal(grid_map.confidence_grid, confidence_grid)
+            
+            # Each cell reports the last detection painted over it
+            for y in range(grid_map.grid_height):
+                for x in range(grid_map.grid_width):
+                    info = grid_map.get_semantic_info(x, y)
+                    expected = semantic.get((x, y))
+                    assert (info is None) == (expected is None)
+                    if info is not None:
+                        assert info['detection_data'] is expected
+                        assert info['class_name'] == expected['class_name']
+                        assert info['confidence'] == expected['confidence']
+            
+            # Only detections still visible somewhere are kept
+            assert len(grid_map.detections_list) == len({id(d) for d in semantic.values()})
+            checked += 1
+    
+    print(f"✅ {checked} map updates match the per-cell reference")
+    return True
+
+def test_grid_queries_match_reference():
+    """Test clearance-based safe radius and both neighbour paths against direct scans"""
+    print("\n🚀 Testing Grid Map Queries")
+    print("=" * 50)
+    
+    rng = np.random.default_rng(7)
+    grid_map = create_random_grid(rng, obstacle_fraction=0.05)
+    
+    def perimeter_scan(grid_x, grid_y, max_radius):
+        for radius in range(1, max_radius + 1):
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    if (abs(dx) == radius or abs(dy) == radius) and \
+                            not grid_map.is_valid_position(grid_x + dx, grid_y + dy):
+                        return radius - 1
+        return max_radius
+    
+    # Every cell plus a ring just off the map
+    for y in range(-1, grid_map.grid_height + 1):
+        for x in range(-1, grid_map.grid_width + 1):
+            for max_radius in (2, 5):
+                assert grid_map.get_safe_radius_around_point(x, y, max_radius) == perimeter_scan(x, y, max_radius)
+    print("✅ Safe radius matches the perimeter scan")
+    
+    # Neighbours in the fixed direction order planners rely on: 4-connected first, then diagonals
+    directions = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+    numba_modes = [True, False] if grid_map_module.NUMBA_AVAILABLE else [False]
+    saved = grid_map_module.NUMBA_AVAILABLE
+    try:
+        for use_numba in numba_modes:
+            grid_map_module.NUMBA_AVAILABLE = use_numba
+            for y in range(grid_map.grid_height):
+                for x in range(grid_map.grid_width):
+                    for include_diagonal, count in ((True, 8), (False, 4)):
+                        expected = [(x + dx, y + dy) for dx, dy in directions[:count]
+                                    if grid_map.is_valid_position(x + dx, y + dy)]
+                        assert grid_map.get_neighbors(x, y, include_diagonal) == expected
+    finally:
+        grid_map_module.NUMBA_AVAILABLE = saved
+    print(f"✅ get_neighbors matches the direct scan ({len(numba_modes)} mode(s))")
+    
+    return True
+
 def test_rrt_star_pathfinding():
     """Test RRT* pathfinding algorithm"""
     print("\n🚀 Testing RRT* Sampling-Based Pathfinding")
@@ -441,6 +932,12 @@ def main():
         
         test_results.append(("A* Algorithm", test_astar_pathfinding()))
         test_results.append(("D* Algorithm", test_dstar_pathfinding()))
+        test_results.append(("A* Optimality", test_astar_matches_dijkstra()))
+        test_results.append(("A* Options", test_astar_options_in_both_modes()))
+        test_results.append(("Line of Sight", test_line_of_sight_matches_bresenham()))
+        test_results.append(("D* Replan Optimality", test_dstar_replan_matches_dijkstra()))
+        test_results.append(("D* Heap Order", test_dstar_heap_order()))
+        test_results.append(("D* Full Recompute", test_dstar_large_change_wavefront()))
         test_results.append(("RRT* Algorithm", test_rrt_star_pathfinding()))
         
         # Comparative tests
@@ -449,6 +946,8 @@ def main():
         print("=" * 60)
         
         test_results.append(("Algorithm Comparison", test_algorithm_comparison()))
+        test_results.append(("Grid Rasterisation", test_grid_rasterization_matches_reference()))
+        test_results.append(("Grid Queries", test_grid_queries_match_reference()))
         
         # Integration tests
         print("\n" + "=" * 60)
@@ -95,8 +95,10 @@ class TTSWorker(threading.Thread):
         try: self.engine.stop()
         except Exception: pass
 
+_WS_RE = re.compile(r"\s+")
+
 def normalize_text(s: str) -> str:
-    return re.sub(r"\s+"," ",s).strip().lower()
+    return _WS_RE.sub(" ", s).strip().lower()
 
 # ------------------ Globals / State ------------------
 CONFIDENCE_THRESHOLD = 0.5
@@ -120,6 +122,17 @@ def is_running() -> bool:
     with RUN_LOCK:
         return RUN_FLAG
 
+# ------------------ Pre-rendered error frames (constant payloads) ------------------
+READ_FAIL_MSG = "Warning: failed to read frame; stream lost."
+
+def _build_error_frame(msg: str, org, scale: float) -> np.ndarray:
+    err = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.putText(err, msg, org, cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 255), 2)
+    return cv2.cvtColor(err, cv2.COLOR_BGR2RGB)
+
+_OPEN_FAIL_RGB = _build_error_frame("Camera failed to open", (40, 240), 1.0)
+_READ_FAIL_RGB = _build_error_frame(READ_FAIL_MSG, (10, 240), 0.7)
+
 # ------------------ Streaming generator (original detection) ------------------
 def stream_frames():
     """
@@ -130,10 +143,7 @@ def stream_frames():
     if CAP is None:
         CAP = open_camera_robust()
         if CAP is None:
-            err = np.zeros((480, 640, 3), dtype=np.uint8)
-            cv2.putText(err, "Camera failed to open", (40, 240),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 2)
-            yield err[:, :, ::-1], "", "**Error:** robust camera failed to open."
+            yield _OPEN_FAIL_RGB, "", "**Error:** robust camera failed to open."
             return
 
     set_running(True)
@@ -142,10 +152,7 @@ def stream_frames():
     while is_running():
         ret, frame_bgr = CAP.read()
         if not ret:
-            dbg = "Warning: failed to read frame; stream lost."
-            err = np.zeros((480, 640, 3), dtype=np.uint8)
-            cv2.putText(err, dbg, (10, 240), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            yield err[:, :, ::-1], "\n".join(_seen_order), dbg
+            yield _READ_FAIL_RGB, "\n".join(_seen_order), READ_FAIL_MSG
             time.sleep(0.05); continue
 
         # ---- NO FLIP (non-mirrored feed) ----
@@ -1,5 +1,9 @@
-import uuid, time, re, tempfile, os
+import uuid, time, re, tempfile, os, queue, threading
 from collections import deque
+from concurrent.futures import Future
+import cv2
+import numpy as np
+import torch
 from ultralytics import YOLO
 import gradio as gr
 from gtts import gTTS
@@ -7,9 +11,29 @@ from pathlib import Path
 
 THIS_DIR = Path(__file__).resolve().parent
 WEIGHTS = THIS_DIR / "weights" / "yolov8s.pt"
-
-# Load model directly from weights
-model = YOLO(WEIGHTS)
+ENGINE = WEIGHTS.with_suffix(".engine")
+IMGSZ = 640
+MAX_BATCH = 8
+BATCH_WINDOW_SEC = 0.005
+
+def load_model():
+    # On CUDA, export a TensorRT FP16 engine once and reuse it on later starts
+    if torch.cuda.is_available():
+        try:
+            if not ENGINE.exists():
+                YOLO(WEIGHTS).export(format="engine", half=True, simplify=True,
+                                     dynamic=True, batch=MAX_BATCH, imgsz=IMGSZ, workspace=4)
+            return YOLO(ENGINE, task="detect")
+        except Exception as e:
+            print("TensorRT export failed, falling back to PyTorch weights:", e)
+    return YOLO(WEIGHTS)
+
+model = load_model()
+
+# Warm up so the first streamed frame doesn't pay engine/CUDA init
+_warm = np.zeros((IMGSZ, IMGSZ, 3), dtype=np.uint8)
+for _ in range(3):
+    model.predict(source=_warm, imgsz=IMGSZ, verbose=False)
 
 def norm_label(s: str) -> str:
     return re.sub(r"[\s_]+", "-", s.strip().lower())
@@ -28,12 +52,57 @@ SAY = {
     "books": "Books ahead",
 }
 
+# Per class-id confidence thresholds (inf = class is never announced)
+CLS_THRESH = np.full(max(names, default=-1) + 1, np.inf, dtype=np.float32)
+for _cls_id, _key in names_norm.items():
+    if _key in CONF_THRESH:
+        CLS_THRESH[_cls_id] = CONF_THRESH[_key]
+
 MIN_AREA_FRAC = 0.012
 IOU_NMS = 0.60
 PERSIST_N = 5
 PERSIST_M = 3
 COOLDOWN_SEC = 3.0
 
+# Frames from concurrent streams are coalesced into one predict() call
+_infer_q: "queue.Queue[tuple]" = queue.Queue()
+
+def _batch_worker():
+    while True:
+        items = [_infer_q.get()]
+        deadline = time.monotonic() + BATCH_WINDOW_SEC
+        while len(items) < MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(_infer_q.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        try:
+            results = model.predict(
+                source=[frame for frame, _ in items],
+                conf=0.25,
+                iou=IOU_NMS,
+                imgsz=IMGSZ,
+                verbose=False
+            )
+        except Exception as e:
+            for _, fut in items:
+                fut.set_exception(e)
+            continue
+
+        for (_, fut), res in zip(items, results):
+            fut.set_result(res)
+
+threading.Thread(target=_batch_worker, daemon=True).start()
+
+def predict_batched(frame):
+    fut = Future()
+    _infer_q.put((frame, fut))
+    return fut.result()
+
 def gen_tts_file(text: str) -> str | None:
     fd, abs_path = tempfile.mkstemp(suffix=".mp3", prefix="tts_")
     os.close(fd)
@@ -52,49 +121,34 @@ def init_state():
         "hist": {cls: deque(maxlen=PERSIST_N) for cls in CONF_THRESH.keys()},
     }
 
-def box_area_xyxy(box):
-    x1, y1, x2, y2 = box
-    return max(0.0, x2 - x1) * max(0.0, y2 - y1)
-
 def detect_and_speak(frame, state):
     if state is None or "hist" not in state:
         state = init_state()
     if frame is None:
         return None, None, state
 
-    frame = frame[:, :, ::-1]  
+    # One contiguous SIMD conversion instead of a negative-stride view
+    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
     H, W = frame.shape[:2]
     frame_area = float(H * W)
 
-    res = model.predict(
-        source=frame,
-        conf=0.25,
-        iou=IOU_NMS,
-        imgsz=640,
-        verbose=False
-    )[0]
+    res = predict_batched(frame)
 
     annotated = res.plot()  
 
     frame_hits = {cls: 0 for cls in CONF_THRESH.keys()}
 
     if res.boxes is not None and len(res.boxes) > 0:
-        cls_list = res.boxes.cls.tolist()
-        conf_list = res.boxes.conf.tolist()
-        xyxy_list = res.boxes.xyxy.cpu().numpy()
-
-        for cls_i, conf_i, box in zip(cls_list, conf_list, xyxy_list):
-            raw = names.get(int(cls_i), str(int(cls_i)))
-            cls_key = norm_label(raw)
+        # Single device->host copy; rows are [x1, y1, x2, y2, (id,) conf, cls]
+        data = res.boxes.data.cpu().numpy()
+        xyxy, conf, cls = data[:, :4], data[:, -2], data[:, -1].astype(np.intp)
 
-            if cls_key not in CONF_THRESH:
-                continue
-            if conf_i < CONF_THRESH[cls_key]:
-                continue
-            if box_area_xyxy(box) < MIN_AREA_FRAC * frame_area:
-                continue
+        wh = np.clip(xyxy[:, 2:] - xyxy[:, :2], 0.0, None)
+        keep = (conf >= CLS_THRESH[cls]) & (wh[:, 0] * wh[:, 1] >= MIN_AREA_FRAC * frame_area)
 
-            frame_hits[cls_key] += 1
+        hit_ids, counts = np.unique(cls[keep], return_counts=True)
+        for cls_id, n in zip(hit_ids.tolist(), counts.tolist()):
+            frame_hits[names_norm[cls_id]] += n
 
     for cls in CONF_THRESH.keys():
         state["hist"][cls].append(1 if frame_hits[cls] > 0 else 0)
@@ -131,11 +185,12 @@ def build_yolo_app():
         def _wrapper(frame, st):
             annotated, audio_path, st = detect_and_speak(frame, st)
             if annotated is not None:
-                annotated = annotated[:, :, ::-1]
+                annotated = cv2.cvtColor(annotated, cv2.COLOR_BGR2RGB)
             audio_out = audio_path if audio_path else gr.update()
             return annotated, audio_out, st
 
         cam.stream(_wrapper, inputs=[cam, state], outputs=[out_img, out_audio, state])
-        demo.queue()
+        # Let several sessions run at once so their frames can share a batch
+        demo.queue(concurrency_count=MAX_BATCH)
 
     return demo
@@ -14,6 +14,7 @@ ML_MODELS_DIR = PROJECT_ROOT / "ML_models"
 # 2. Imports
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import gradio as gr
 
 # ML model app builders
@@ -21,7 +22,7 @@ from ML_models.yolo_nav.live_gradio import build_yolo_app
 from ML_models.live_ocr.live_ocr_tts import build_ocr_app
 
 # 3. Create FastAPI app
-app = FastAPI(title="AI Assist Backend")
+app = FastAPI(title="AI Assist Backend", default_response_class=ORJSONResponse)
 
 
 # 4. CORS (required for mobile/web)
@@ -51,12 +52,20 @@ app = gr.mount_gradio_app(app, ocr_blocks, path="/ocr")
 
 
 # 8. Allow `python main.py` to run the server
+#    Each worker is a separate process with its own models, camera handle and
+#    TTS thread, so UVICORN_WORKERS > 1 only suits stateless deployments.
 if __name__ == "__main__":
+    import os
     import uvicorn
 
+    workers = int(os.getenv("UVICORN_WORKERS", "1"))
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",  # uvloop has no Windows build
+        http="httptools",
+        workers=workers,
+        reload=workers == 1,
     )